@@ -0,0 +1,215 @@
+"""Load benchmark of sync and async (adrf) variants of search and batch endpoints under ASGI server.
+
+Both variants are served by one uvicorn server (in background thread), requests are sent by simple
+keep-alive HTTP client with given concurrency. Reports requests per second and latency percentiles.
+Latency of remote database can be simulated by --db-latency (sleep before every query).
+Models are created dynamically in temporary SQLite database.
+
+Usage (requires uvicorn and adrf):
+    python benchmarks/asgi_load.py [--rows 5000] [--requests 2000] [--concurrency 50] [--db-latency 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+SCENARIOS = ('search', 'batch')
+urlpatterns = []
+
+
+def setup_django(database: str):
+    settings.configure(
+        DEBUG=False,
+        ALLOWED_HOSTS=['*'],
+        ROOT_URLCONF=__name__,
+        DATABASES={'default': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': database, 'OPTIONS': {'timeout': 30},
+        }},
+        INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'rest_framework', 'dcore'],
+        MIDDLEWARE=['django.middleware.common.CommonMiddleware'],  # sets Content-Length
+        DEFAULT_AUTO_FIELD='django.db.models.AutoField',
+        REST_FRAMEWORK={
+            'DEFAULT_AUTHENTICATION_CLASSES': [],
+            'DEFAULT_PERMISSION_CLASSES': [],
+            'UNAUTHENTICATED_USER': None,
+            'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+            'PAGE_SIZE': 20,
+        },
+    )
+    django.setup()
+
+
+def create_views(rows: int):
+    """Create model with rows, sync and async viewsets and their URLs."""
+    from django.db import connection, models
+    from django.urls import path
+    from rest_framework import serializers, viewsets
+    from adrf.viewsets import GenericViewSet as AsyncGenericViewSet
+    from dcore.api_mixins import (
+        AsyncBatchEndpointMixin, AsyncSearchViewSetMixin, BatchEndpointMixin, SearchViewSetMixin,
+    )
+
+    item_model = type('BenchItem', (models.Model,), {
+        '__module__': __name__,
+        'name': models.CharField(max_length=50),
+        'value': models.IntegerField(default=0, db_index=True),
+        'Meta': type('Meta', (), {'app_label': 'dcore'}),
+    })
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+    with connection.schema_editor() as schema_editor:
+        schema_editor.create_model(item_model)
+    item_model.objects.bulk_create([item_model(name=f'item {index}', value=index % 100) for index in range(rows)])
+
+    class ItemSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = item_model
+            fields = ['id', 'name', 'value']
+
+    class ItemFilter:
+        """Minimal filterset (django-filter is not required)."""
+
+        def __init__(self, data, queryset):
+            self.qs = queryset.filter(value__gte=int(data.get('value__gte', 0)))
+
+    attrs = {
+        'queryset': item_model.objects.order_by('id'),
+        'serializer_class': ItemSerializer,
+        'filterset_class': ItemFilter,
+        'batch_update_method': 'bulk_update',
+    }
+    sync_view = type('SyncItemViewSet', (SearchViewSetMixin, BatchEndpointMixin, viewsets.GenericViewSet), attrs)
+    async_view = type(
+        'AsyncItemViewSet', (AsyncSearchViewSetMixin, AsyncBatchEndpointMixin, AsyncGenericViewSet), attrs
+    )
+    for prefix, view in (('sync', sync_view), ('async', async_view)):
+        urlpatterns.append(path(f'{prefix}/search/', view.as_view({'post': 'search'})))
+        urlpatterns.append(path(f'{prefix}/batch/', view.as_view({'patch': 'batch'})))
+    return item_model
+
+
+def add_db_latency(latency: float):
+    """Sleep before every query of every connection, simulates latency of remote database."""
+    from django.db.backends.signals import connection_created
+
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def connect(sender, connection, **kwargs):
+        connection.execute_wrappers.append(wrapper)
+
+    connection_created.connect(connect, weak=False)
+
+
+def start_server(port: int):
+    import uvicorn
+    from django.core.asgi import get_asgi_application
+
+    server = uvicorn.Server(uvicorn.Config(get_asgi_application(), port=port, log_level='error', lifespan='off'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def build_request(scenario: str, prefix: str, rows: int) -> bytes:
+    if scenario == 'search':
+        method, path, body = 'POST', f'/{prefix}/search/?page={random.randint(1, 5)}', {
+            'value__gte': random.randint(0, 90),
+        }
+    else:
+        method, path, body = 'PATCH', f'/{prefix}/batch/', {'items': [
+            {'id': random.randint(1, rows), 'value': random.randint(0, 99)} for __ in range(20)
+        ]}
+    payload = json.dumps(body).encode('utf-8')
+    return (
+        f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(payload)}\r\n\r\n'
+    ).encode('ascii') + payload
+
+
+async def client(port: int, requests: list, latencies: list, statuses: dict):
+    """Send requests one by one over one keep-alive connection."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for request in requests:
+        start = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while (line := await reader.readline()) != b'\r\n':
+            name, __, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+    writer.close()
+
+
+async def run_load(port: int, scenario: str, prefix: str, rows: int, total: int, concurrency: int):
+    latencies = []
+    statuses = {}
+    per_client = [
+        [build_request(scenario, prefix, rows) for __ in range(total // concurrency)] for __ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, requests, latencies, statuses) for requests in per_client))
+    return time.perf_counter() - start, latencies, statuses
+
+
+def percentile(values: list, percent: float) -> float:
+    return statistics.quantiles(values, n=100, method='inclusive')[int(percent) - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per scenario and variant.')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--db-latency', type=float, default=0, help='Simulated latency of query in ms.')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'asgi_load.sqlite3')
+    setup_django(database)
+    create_views(args.rows)
+    if args.db_latency:
+        add_db_latency(args.db_latency / 1000)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = start_server(port)
+
+    print(f'{"scenario":>8} {"variant":>7} {"requests":>8} {"errors":>6} {"req/s":>8} '
+          f'{"p50 [ms]":>9} {"p95 [ms]":>9} {"p99 [ms]":>9}')
+    for scenario in args.scenarios:
+        for prefix in ('sync', 'async'):
+            asyncio.run(run_load(port, scenario, prefix, args.rows, args.concurrency, args.concurrency))  # warm up
+            duration, latencies, statuses = asyncio.run(
+                run_load(port, scenario, prefix, args.rows, args.requests, args.concurrency)
+            )
+            errors = sum(count for status, count in statuses.items() if status != 200)
+            percentiles = ' '.join(f'{percentile(latencies, percent):>9.1f}' for percent in (50, 95, 99))
+            print(
+                f'{scenario:>8} {prefix:>7} {len(latencies):>8} {errors:>6} {len(latencies) / duration:>8.1f} '
+                f'{percentiles}'
+            )
+    server.should_exit = True
+
+
+if __name__ == '__main__':
+    main()
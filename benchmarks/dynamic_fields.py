@@ -0,0 +1,89 @@
+"""Benchmark of field plan cache of dcore.serializers.DynamicFieldsSerializerMixin.
+
+Compares construction of serializer with query params fields, exclude_fields and extra_fields
+without cache (dynamic_fields_cache_size = 0) and with cache (default size) for serializers
+with different number of fields and field groups. Plain serializer (without mixin) is the baseline,
+binding of its fields is paid by both variants.
+
+Usage:
+    python benchmarks/dynamic_fields.py [--fields 20 80 320] [--repeat 300]
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+
+def setup_django():
+    settings.configure(
+        INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'rest_framework'],
+    )
+    django.setup()
+
+
+def create_serializer_class(field_count: int, cache_size: int, dynamic: bool = True):
+    """Return serializer class with field_count integer fields, field groups and default fields."""
+    from rest_framework import serializers
+    from dcore.serializers import DynamicFieldsSerializerMixin
+
+    fields = {f'field{index}': serializers.IntegerField() for index in range(field_count)}
+    names = list(fields)
+    meta = type('Meta', (), {
+        'fields': names,
+        'field_groups': {f'group{index}': names[index::3] for index in range(field_count // 4)},
+        'default_fields': names[:5],
+    })
+    bases = (DynamicFieldsSerializerMixin, serializers.Serializer) if dynamic else (serializers.Serializer,)
+    return type('BenchSerializer', bases, {
+        **fields, 'Meta': meta, 'dynamic_fields_cache_size': cache_size,
+    })
+
+
+def create_request(field_count: int):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    fields = ','.join(f'field{index}' for index in range(0, field_count, 2))
+    return Request(APIRequestFactory().get(f'/?fields={fields}&exclude_fields=field2&extra_fields=field3'))
+
+
+def measure(serializer_class, request, repeat: int, rounds: int = 5) -> float:
+    """Return the best time of serializer construction in ms from rounds."""
+    serializer_class(context={'request': request}).fields  # warm up (fills cache)
+    times = []
+    for __ in range(rounds):
+        start = time.perf_counter()
+        for __ in range(repeat):
+            serializer_class(context={'request': request}).fields  # plain serializer binds fields lazily
+        times.append((time.perf_counter() - start) / repeat * 1000)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fields', type=int, nargs='+', default=[20, 80, 320])
+    parser.add_argument('--repeat', type=int, default=300)
+    args = parser.parse_args()
+
+    setup_django()
+    from dcore.serializers import DynamicFieldsSerializerMixin
+
+    print(f'{"fields":>6} {"plain [ms]":>11} {"no cache [ms]":>14} {"cache [ms]":>11}')
+    for field_count in args.fields:
+        request = create_request(field_count)
+        plain = measure(create_serializer_class(field_count, 0, dynamic=False), request, args.repeat)
+        uncached = measure(create_serializer_class(field_count, 0), request, args.repeat)
+        cached = measure(
+            create_serializer_class(field_count, DynamicFieldsSerializerMixin.dynamic_fields_cache_size),
+            request, args.repeat,
+        )
+        print(f'{field_count:>6} {plain:>11.4f} {uncached:>14.4f} {cached:>11.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark of subclass loading strategies of dcore.managers.InheritanceManager.
+
+Compares 'join' (one query with LEFT JOIN per subclass table) with 'two_phase'
+(base rows with discriminator, then one query per subclass present) for hierarchies
+of different width. Models are created dynamically in in-memory SQLite database.
+
+Usage (requires django-model-utils):
+    python benchmarks/inheritance_loading.py [--rows 5000] [--widths 2 8 32] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+
+def setup_django():
+    settings.configure(
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+        INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'dcore'],
+        DEFAULT_AUTO_FIELD='django.db.models.AutoField',
+    )
+    django.setup()
+
+
+def create_hierarchy(width: int):
+    """Create base model with 'width' subclasses (and their tables), return (base model, subclasses)."""
+    from django.db import connection, models
+    from dcore.managers import InheritanceManager
+
+    module = f'benchmark_width_{width}'
+    base_model = type(f'Base{width}', (models.Model,), {
+        '__module__': module,
+        'name': models.CharField(max_length=50),
+        'objects': InheritanceManager(),
+        'Meta': type('Meta', (), {'app_label': 'dcore'}),
+    })
+    subclasses = [
+        type(f'Sub{width}x{index}', (base_model,), {
+            '__module__': module,
+            'value': models.IntegerField(default=index),
+            'label': models.CharField(max_length=50, default=''),
+            'Meta': type('Meta', (), {'app_label': 'dcore'}),
+        })
+        for index in range(width)
+    ]
+    with connection.schema_editor() as schema_editor:
+        schema_editor.create_model(base_model)
+        for subclass in subclasses:
+            schema_editor.create_model(subclass)
+    return base_model, subclasses
+
+
+def fill(subclasses, rows: int):
+    for index in range(rows):
+        subclasses[index % len(subclasses)].objects.create(name=f'name {index}', label=f'label {index}')
+
+
+def measure(queryset, repeat: int) -> float:
+    best = None
+    for __ in range(repeat):
+        start = time.perf_counter()
+        list(queryset.all())
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--widths', type=int, nargs='+', default=[2, 8, 32])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+
+    print(f'{"width":>6} {"rows":>8} {"join [s]":>10} {"two_phase [s]":>14}')
+    for width in args.widths:
+        base_model, subclasses = create_hierarchy(width)
+        fill(subclasses, args.rows)
+        join = measure(base_model.objects.all().subclass_loading('join'), args.repeat)
+        two_phase = measure(base_model.objects.all().subclass_loading('two_phase'), args.repeat)
+        print(f'{width:>6} {args.rows:>8} {join:>10.4f} {two_phase:>14.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark of exempt URL matching of dcore.middleware.force_login_middleware.
+
+Compares linear matching (any(regex.match(path) for regex in exempt_urls)) with matcher
+compiled by compile_url_matcher for growing number of exempt patterns.
+
+Usage:
+    python benchmarks/login_exempt_urls.py [--counts 10 100 1000] [--paths 10000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+
+def create_patterns(count: int) -> list:
+    """Return exempt patterns, half literal prefixes, half regexes."""
+    patterns = []
+    for index in range(count):
+        if index % 2:
+            patterns.append(f'^/public/page-{index}/')
+        else:
+            patterns.append(rf'^/webhooks/{index}/\d+/$')
+    return patterns
+
+
+def create_paths(count: int, pattern_count: int) -> list:
+    """Return paths, mostly not exempt (worst case for linear matching)."""
+    paths = []
+    for index in range(count):
+        if index % 10 == 0:
+            paths.append(f'/public/page-{(index % pattern_count) | 1}/detail/')
+        else:
+            paths.append(f'/app/items/{index}/')
+    return paths
+
+
+def measure(match, paths: list) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        match(path)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--paths', type=int, default=10000)
+    args = parser.parse_args()
+
+    from dcore.middleware import compile_url_matcher
+
+    print(f'{"patterns":>8} {"linear [s]":>11} {"compiled [s]":>13}')
+    for count in args.counts:
+        patterns = create_patterns(count)
+        paths = create_paths(args.paths, count)
+        regexes = [re.compile(pattern) for pattern in patterns]
+        compiled_match = compile_url_matcher(patterns)
+        assert all(compiled_match(path) == any(r.match(path) for r in regexes) for path in paths)
+
+        linear = measure(lambda path: any(regex.match(path) for regex in regexes), paths)
+        compiled = measure(compiled_match, paths)
+        print(f'{count:>8} {linear:>11.4f} {compiled:>13.4f}')
+
+
+if __name__ == '__main__':
+    main()
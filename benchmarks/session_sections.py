@@ -0,0 +1,67 @@
+"""Benchmark of session section encoding by dcore.service.CompactSectionCodec.
+
+Compares size and encode/decode time of wizard-like sections of different size
+with plain JSON (as Django JSON session serializer stores them).
+
+Usage:
+    python benchmarks/session_sections.py [--sizes 10 100 1000] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+
+def create_section(rows: int) -> dict:
+    """Return wizard-like state with rows of form data."""
+    return {
+        'step': 3,
+        'rows': [
+            {'id': index, 'name': f'Item {index}', 'quantity': index % 7, 'note': 'Lorem ipsum dolor sit amet.'}
+            for index in range(rows)
+        ],
+    }
+
+
+def measure(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for __ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    from django.conf import settings
+    settings.configure()
+    from dcore.service import CompactSectionCodec
+
+    codec = CompactSectionCodec()
+    print(
+        f'{"rows":>6} {"json [B]":>10} {"codec [B]":>10} {"json enc [ms]":>14} {"codec enc [ms]":>15} '
+        f'{"json dec [ms]":>14} {"codec dec [ms]":>15}'
+    )
+    for rows in args.sizes:
+        section = create_section(rows)
+        # Session serializer stores encoded section as JSON string, measure it the same way.
+        plain = json.dumps(section, separators=(',', ':'))
+        encoded = json.dumps(codec.encode(section), separators=(',', ':'))
+        print(
+            f'{rows:>6} {len(plain):>10} {len(encoded):>10} '
+            f'{measure(lambda: json.dumps(section, separators=(",", ":")), args.repeat):>14.4f} '
+            f'{measure(lambda: json.dumps(codec.encode(section), separators=(",", ":")), args.repeat):>15.4f} '
+            f'{measure(lambda: json.loads(plain), args.repeat):>14.4f} '
+            f'{measure(lambda: codec.decode(json.loads(encoded)), args.repeat):>15.4f}'
+        )
+    print(f'Codec stats: {codec.stats}')
+
+
+if __name__ == '__main__':
+    main()
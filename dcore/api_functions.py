@@ -1,5 +1,6 @@
-from typing import Type
+from typing import Optional, Tuple, Type
 
+from asgiref.sync import sync_to_async
 from django.db import transaction
 from django.db.models.query import QuerySet
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
@@ -7,6 +8,10 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import ModelSerializer
 from rest_framework import status as http_status
+from .bulk_utils import DEFAULT_BATCH_SIZE, assign_validated_data, bulk_update_instances, chunked
+from .exceptions import InvalidData
+from .serializers import rebind_serializer, save_validated_data
+from .stream_utils import iter_request_items
 from .validation_utils import validation_failed_dict
 
 
@@ -16,14 +21,37 @@ def bulk_update(
     queryset: QuerySet,
     serializer_class: Type[ModelSerializer],
     pk_name: str = 'id',
+    update_method: str = 'save',
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    streaming: bool = False,
 ):
-    """Function to add bulk_update endpoint into rest_framework.viewsets.ModelViewSet"""
+    """Function to add bulk_update endpoint into rest_framework.viewsets.ModelViewSet
+
+    Args:
+        update_method: How to persist items.
+            'save' - call serializer.save() for each item (default, full serializer/model save logic).
+            'bulk_update' - load all items with one query and save them by QuerySet.bulk_update,
+                limited to fields changed in request. Model.save() and save signals are NOT called.
+        batch_size: Size of batches for QuerySet.bulk_update (used only with update_method 'bulk_update'),
+            or size of processed chunks in streaming mode.
+        streaming: Parse items incrementally from request body (JSON array or NDJSON) and process them
+            in chunks of batch_size, so memory usage does not depend on size of request.
+            Response contains only number of updated items: {"count": n}. Do not access request.data before.
+    """
+    assert update_method in ['save', 'bulk_update'], 'Invalid value in "update_method" argument.'
+
+    if streaming:
+        return _bulk_update_streaming(request, queryset, serializer_class, pk_name, update_method, batch_size)
+
     request_data = request.data
     if not isinstance(request_data, list):
         err = validation_failed_dict([(2513, None, "Expected list of dictionaries.")])
         return Response(err, status=http_status.HTTP_400_BAD_REQUEST)
+    if update_method == 'bulk_update':
+        return _bulk_update_set_based(request, queryset, serializer_class, pk_name, batch_size)
     any_error = False
-    serializers = []
+    serializer = serializer_class(partial=True, context={'request': request})
+    validated_items = []
     for item_data in request_data:
         if not isinstance(item_data, dict):
             any_error = True
@@ -37,14 +65,218 @@ def bulk_update(
         except (ObjectDoesNotExist, ValidationError):
             any_error = True
             break
-        serializer = serializer_class(item, data=item_data, partial=True, context={'request': request})
+        rebind_serializer(serializer, item, data=item_data)
         if not serializer.is_valid():
             any_error = True
             break
-        serializers.append(serializer)
+        validated_items.append((item, serializer.validated_data))
     if any_error:
         err = validation_failed_dict([(2951, None, 'Error in data for bulk action.')])
         return Response(err, status=http_status.HTTP_400_BAD_REQUEST)
-    instances = [serializer.save() for serializer in serializers]
+    instances = [save_validated_data(serializer, item, validated_data) for item, validated_data in validated_items]
     response_serializer = serializer_class(instances, many=True, context={'request': request})
     return Response(response_serializer.data, status=http_status.HTTP_200_OK)
+
+
+async def abulk_update(
+    request: Request,
+    queryset: QuerySet,
+    serializer_class: Type[ModelSerializer],
+    pk_name: str = 'id',
+    update_method: str = 'save',
+    batch_size: int = DEFAULT_BATCH_SIZE,
+):
+    """Async variant of bulk_update for async actions of adrf ViewSet, see bulk_update.
+
+    Updated objects are loaded by async ORM (QuerySet.ain_bulk). Validation and saving run in one transaction
+    in sync thread (sync_to_async), because Django does not support transactions in async code and
+    validators may query database. Streaming is not supported.
+    """
+    assert update_method in ['save', 'bulk_update'], 'Invalid value in "update_method" argument.'
+
+    request_data = request.data
+    if not isinstance(request_data, list):
+        err = validation_failed_dict([(2513, None, "Expected list of dictionaries.")])
+        return Response(err, status=http_status.HTTP_400_BAD_REQUEST)
+
+    pk_values, error_response = _get_bulk_update_pk_values(queryset, pk_name, request_data)
+    if error_response is not None:
+        return error_response
+    instances_by_pk = await queryset.ain_bulk(pk_values, field_name=pk_name)
+    error_response = _get_missing_pks_response(pk_name, pk_values, instances_by_pk)
+    if error_response is not None:
+        if update_method == 'save':
+            # The same error as bulk_update, which loads items one by one.
+            err = validation_failed_dict([(2951, None, 'Error in data for bulk action.')])
+            error_response = Response(err, status=http_status.HTTP_400_BAD_REQUEST)
+        return error_response
+
+    instances, error_response = await sync_to_async(transaction.atomic(_save_bulk_update_items))(
+        request, queryset, serializer_class, request_data, pk_values, instances_by_pk, update_method, batch_size
+    )
+    if error_response is not None:
+        return error_response
+
+    def get_response_data():
+        return serializer_class(instances, many=True, context={'request': request}).data
+
+    return Response(await sync_to_async(get_response_data)(), status=http_status.HTTP_200_OK)
+
+
+def _bulk_update_set_based(
+    request: Request,
+    queryset: QuerySet,
+    serializer_class: Type[ModelSerializer],
+    pk_name: str,
+    batch_size: int,
+):
+    """Implementation of bulk_update with update_method 'bulk_update'.
+
+    Must be called inside transaction (see bulk_update).
+    """
+    instances, error_response = _bulk_update_items(
+        request, queryset, serializer_class, pk_name, request.data, 'bulk_update', batch_size
+    )
+    if error_response is not None:
+        return error_response
+    response_serializer = serializer_class(instances, many=True, context={'request': request})
+    return Response(response_serializer.data, status=http_status.HTTP_200_OK)
+
+
+def _bulk_update_streaming(
+    request: Request,
+    queryset: QuerySet,
+    serializer_class: Type[ModelSerializer],
+    pk_name: str,
+    update_method: str,
+    batch_size: int,
+):
+    """Implementation of bulk_update with streaming=True.
+
+    Must be called inside transaction (see bulk_update), transaction is rolled back on error.
+    """
+    count = 0
+    try:
+        for items in chunked(iter_request_items(request), batch_size):
+            with transaction.atomic():
+                instances, error_response = _bulk_update_items(
+                    request, queryset, serializer_class, pk_name, items, update_method, batch_size
+                )
+            if error_response is not None:
+                transaction.set_rollback(True)
+                return error_response
+            count += len(instances)
+    except InvalidData:
+        transaction.set_rollback(True)
+        err = validation_failed_dict([(2513, None, "Expected list of dictionaries.")])
+        return Response(err, status=http_status.HTTP_400_BAD_REQUEST)
+    return Response({'count': count}, status=http_status.HTTP_200_OK)
+
+
+def _bulk_update_items(
+    request: Request,
+    queryset: QuerySet,
+    serializer_class: Type[ModelSerializer],
+    pk_name: str,
+    items: list,
+    update_method: str,
+    batch_size: int,
+) -> Tuple[list, Optional[Response]]:
+    """Load items by one query, validate and save them.
+
+    Returns:
+        tuple: (updated instances, None) or ([], error response)
+    """
+    pk_values, error_response = _get_bulk_update_pk_values(queryset, pk_name, items)
+    if error_response is not None:
+        return [], error_response
+
+    # in_bulk splits lookup into more queries only if database has limit for number of query params.
+    instances_by_pk = queryset.in_bulk(pk_values, field_name=pk_name)
+    error_response = _get_missing_pks_response(pk_name, pk_values, instances_by_pk)
+    if error_response is not None:
+        return [], error_response
+
+    return _save_bulk_update_items(
+        request, queryset, serializer_class, items, pk_values, instances_by_pk, update_method, batch_size
+    )
+
+
+def _get_bulk_update_pk_values(queryset: QuerySet, pk_name: str, items: list) -> Tuple[list, Optional[Response]]:
+    """Pop PK values from items.
+
+    Returns:
+        tuple: (PK values, None) or ([], error response)
+    """
+    bulk_error = validation_failed_dict([(2951, None, 'Error in data for bulk action.')])
+    pk_field = queryset.model._meta.get_field(pk_name)
+
+    pk_values = []
+    for item_data in items:
+        if not isinstance(item_data, dict):
+            return [], Response(bulk_error, status=http_status.HTTP_400_BAD_REQUEST)
+        pk_value = item_data.pop(pk_name, None)
+        if pk_value is None:
+            return [], Response(bulk_error, status=http_status.HTTP_400_BAD_REQUEST)
+        try:
+            pk_values.append(pk_field.to_python(pk_value))
+        except ValidationError:
+            return [], Response(bulk_error, status=http_status.HTTP_400_BAD_REQUEST)
+    return pk_values, None
+
+
+def _get_missing_pks_response(pk_name: str, pk_values: list, instances_by_pk: dict) -> Optional[Response]:
+    """Return error response if any instance is missing, else None."""
+    missing_pks = [pk_value for pk_value in pk_values if pk_value not in instances_by_pk]
+    if not missing_pks:
+        return None
+    err = validation_failed_dict([(
+        2951, None, 'Error in data for bulk action.',
+        [(2952, pk_name, f'Object with {pk_name} "{pk_value}" does not exist.') for pk_value in missing_pks]
+    )])
+    return Response(err, status=http_status.HTTP_400_BAD_REQUEST)
+
+
+def _save_bulk_update_items(
+    request: Request,
+    queryset: QuerySet,
+    serializer_class: Type[ModelSerializer],
+    items: list,
+    pk_values: list,
+    instances_by_pk: dict,
+    update_method: str,
+    batch_size: int,
+) -> Tuple[list, Optional[Response]]:
+    """Validate items against loaded instances and save them.
+
+    Returns:
+        tuple: (updated instances, None) or ([], error response)
+    """
+    bulk_error = validation_failed_dict([(2951, None, 'Error in data for bulk action.')])
+    # One serializer (with fields built only once) validates all items.
+    serializer = serializer_class(partial=True, context={'request': request})
+    validated_items = []
+    for pk_value, item_data in zip(pk_values, items):
+        instance = instances_by_pk[pk_value]
+        rebind_serializer(serializer, instance, data=item_data)
+        if not serializer.is_valid():
+            return [], Response(bulk_error, status=http_status.HTTP_400_BAD_REQUEST)
+        validated_items.append((instance, serializer.validated_data))
+
+    if update_method == 'save':
+        instances = [
+            save_validated_data(serializer, instance, validated_data) for instance, validated_data in validated_items
+        ]
+        return instances, None
+
+    changed_fields = set()
+    many_to_many = []
+    for instance, validated_data in validated_items:
+        item_changed_fields, item_many_to_many = assign_validated_data(instance, validated_data)
+        changed_fields |= item_changed_fields
+        many_to_many += [(instance, field_name, value) for field_name, value in item_many_to_many]
+
+    bulk_update_instances(queryset, list(instances_by_pk.values()), changed_fields, batch_size=batch_size)
+    for instance, field_name, value in many_to_many:
+        getattr(instance, field_name).set(value)
+    return [instance for instance, __ in validated_items], None
@@ -1,12 +1,101 @@
+import hashlib
+import io
+import json
+import logging
+from typing import Tuple
+
+from asgiref.sync import sync_to_async
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.decorators import action
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework import status as http_status
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections, transaction
 from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.urls import NoReverseMatch
+from django.utils import timezone
+
+from .bulk_utils import (
+    DEFAULT_BATCH_SIZE,
+    assign_validated_data,
+    bulk_get_or_create,
+    bulk_replace,
+    bulk_update_instances,
+    chunked,
+    load_by_natural_key,
+    natural_key,
+)
+from .db_routers import choose_replica, is_pinned_to_primary, pin_to_primary, set_read_alias
+from .exceptions import InvalidData
+from .import_utils import import_rows
+from .model_generations import are_models_tracked, get_model_generations
+from .pagination import ASYNC_COUNT_STRATEGIES, COUNT_STRATEGIES, apaginate_keyset, paginate_keyset, with_known_count
+from .serializers import DynamicFieldsSerializerMixin, rebind_serializer, save_validated_data
+from .signals import bulk_changed
+from .stream_utils import (
+    NDJSON_MEDIA_TYPES,
+    iter_csv,
+    iter_ndjson,
+    iter_request_items,
+    stream_csv,
+    stream_json_array,
+    stream_ndjson,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class SearchViewSetMixin:
-    """Add search endpoint into ViewSet."""
+    """Add search endpoint into ViewSet.
+
+    Settings by class attribute:
+    ----------------------------
+    search_pagination : str
+        'page' = paginator of view (pagination_class), default.
+        'keyset' = keyset (cursor) pagination, without COUNT and OFFSET, cost of any page is the same.
+        Response is {"next": cursor of next page or null, "results": [...]}, next page is requested
+        by query param 'cursor' (editable by 'search_cursor_query_param') with the same search data.
+    search_keyset_ordering : tuple
+        Ordering of keyset pagination, e.g. ('-created', 'id'), default is ordering of queryset.
+        PK is added if missing. Use fields without NULL values (ideally with index).
+    search_page_size : int
+        Page size of keyset pagination, default is page size of view paginator (or 100).
+    search_count_strategy : str
+        Count of objects for 'page' pagination, see dcore.pagination.COUNT_STRATEGIES:
+        'exact' = COUNT(*), default.
+        'capped' = count limited to 'search_count_cap' (COUNT over LIMIT subquery).
+        'estimated' = estimate of query planner for big counts (PostgreSQL), else 'capped'.
+        Not exact strategies add "count_exact" into response.
+    search_count_cap : int
+        Max exact count of 'capped' and 'estimated' strategy, default 10000.
+    search_count_cache_timeout : int
+        Cache count for given search data (and user) for number of seconds, default 0 = no caching.
+        Cache is selected by 'search_cache_alias'.
+    search_cache_timeout : int
+        Cache whole response for number of seconds, default 0 = no caching. Key of cache contains
+        search data, query params, user, fields of serializer and generations of models
+        (see dcore.model_generations, the models have to be tracked, e.g. by DCORE_MODEL_GENERATIONS_MODELS).
+        Any change of model of queryset (or models in 'search_cache_models') invalidates cached responses.
+    search_cache_models : tuple
+        Other models used in response (e.g. models of nested serializers).
+    """
+
+    search_pagination = 'page'
+    search_keyset_ordering = None
+    search_page_size = None
+    search_cursor_query_param = 'cursor'
+    search_count_strategy = 'exact'
+    search_count_cap = 10000
+    search_count_cache_timeout = 0
+    search_cache_alias = 'default'
+    search_cache_timeout = 0
+    search_cache_models = ()
 
     @action(methods=["post"], detail=False)
     def search(self, request: Request):
@@ -18,23 +107,357 @@ class SearchViewSetMixin:
         - ViewSet has to have field filterset_class with django_filters class
         - ViewSet has to be subclass of rest_framework.generics.GenericAPIView
         """
+        assert self.search_pagination in ['page', 'keyset']
+        assert self.search_count_strategy in COUNT_STRATEGIES
+
+        if not self.search_cache_timeout:
+            return self._search_response(request)
+
+        assert are_models_tracked(self.get_search_cache_models()), \
+            'Cache of search requires tracked models (DCORE_MODEL_GENERATIONS_MODELS setting).'
+        cache = caches[self.search_cache_alias]
+        cache_key = self.get_search_response_cache_key(request)
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+        response = self._search_response(request)
+        if response.status_code == http_status.HTTP_200_OK:
+            cache.set(cache_key, response.data, self.search_cache_timeout)
+        return response
+
+    def _search_response(self, request: Request):
+        queryset = self.get_search_queryset(request)
+
+        if self.search_pagination == 'keyset':
+            return self._keyset_search_response(request, queryset)
+
+        count_exact = True
+        if self.paginator is not None and (
+            self.search_count_strategy != 'exact' or self.search_count_cache_timeout
+        ):
+            count, count_exact = self.get_search_count(request, queryset)
+            queryset = with_known_count(queryset, count)
+        return self._page_search_response(queryset, count_exact)
+
+    def get_search_queryset(self, request: Request):
+        """Return queryset filtered by filterset_class with search data."""
         filterset = self.filterset_class(
             data=request.data, queryset=self.get_queryset()
         )
-        queryset = filterset.qs
+        return filterset.qs
 
+    def _page_search_response(self, queryset, count_exact: bool):
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+            if self.search_count_strategy != 'exact' and isinstance(response.data, dict):
+                response.data['count_exact'] = count_exact
+            return response
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    def get_search_cache_key(self, request: Request, prefix: str, *parts) -> str:
+        """Return cache key of search request, made from normalized search data, user and parts."""
+        data = request.data
+        if hasattr(data, 'lists'):
+            data = dict(data.lists())  # QueryDict of form data
+        user = getattr(request, 'user', None)
+        key_data = json.dumps(
+            [
+                f'{type(self).__module__}.{type(self).__qualname__}',
+                user.pk if user is not None and user.is_authenticated else None,
+                data,
+                *parts,
+            ],
+            sort_keys=True, separators=(',', ':'), default=str,
+        )
+        return f'dcore_search:{prefix}:{hashlib.sha256(key_data.encode("utf-8")).hexdigest()}'
+
+    def get_search_cache_models(self) -> list:
+        """Return models whose changes invalidate cached search data."""
+        return [self.get_queryset().model, *self.search_cache_models]
+
+    def get_search_response_cache_key(self, request: Request) -> str:
+        """Return cache key of search response (search data, query params, user, fields, model generations)."""
+        serializer = self.get_serializer()
+        if isinstance(serializer, DynamicFieldsSerializerMixin):
+            field_names = sorted(serializer.selected_field_names)
+        else:
+            field_names = f'{type(serializer).__module__}.{type(serializer).__qualname__}'
+        return self.get_search_cache_key(
+            request, 'response',
+            sorted(request.query_params.lists()),
+            field_names,
+            get_model_generations(self.get_search_cache_models()),
+        )
+
+    def get_search_count(self, request: Request, queryset) -> Tuple[int, bool]:
+        """Return (count, is exact) of searched objects by 'search_count_strategy', cached if enabled."""
+        count_function = COUNT_STRATEGIES[self.search_count_strategy]
+        if not self.search_count_cache_timeout:
+            return count_function(queryset, self.search_count_cap)
+
+        cache = caches[self.search_cache_alias]
+        key = self._get_search_count_cache_key(request)
+        result = cache.get(key)
+        if result is None:
+            result = count_function(queryset, self.search_count_cap)
+            cache.set(key, result, self.search_count_cache_timeout)
+        return tuple(result)
+
+    def _get_search_count_cache_key(self, request: Request) -> str:
+        key_parts = [self.search_count_strategy, self.search_count_cap]
+        models = self.get_search_cache_models()
+        if are_models_tracked(models):
+            key_parts.append(get_model_generations(models))
+        return self.get_search_cache_key(request, 'count', *key_parts)
+
+    def get_search_page_size(self) -> int:
+        if self.search_page_size:
+            return self.search_page_size
+        return getattr(self.paginator, 'page_size', None) or 100
+
+    def _keyset_search_response(self, request: Request, queryset):
+        try:
+            objects, next_cursor = paginate_keyset(
+                queryset,
+                self.get_search_page_size(),
+                cursor=request.query_params.get(self.search_cursor_query_param),
+                ordering=self.search_keyset_ordering,
+            )
+        except InvalidData as e:
+            return Response(str(e), status=http_status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(objects, many=True)
+        return Response({'next': next_cursor, 'results': serializer.data})
+
+
+class ExportViewSetMixin:
+    """Add export endpoint into ViewSet, it streams all filtered objects as JSON array, NDJSON or CSV.
+
+    Objects are loaded by QuerySet.iterator (server-side cursor where available) and serialized in chunks,
+    so memory usage does not depend on number of exported objects.
+    GET filters queryset by filter backends of view (as list), POST by filterset_class with request data
+    (as search). Format is selected by query param 'export_format' (json, ndjson, csv).
+
+    Settings by class attribute:
+    ----------------------------
+    export_formats : tuple
+        Allowed formats, the first one is default.
+    export_chunk_size : int
+        Number of objects loaded and serialized at once.
+    export_filename : str
+        Name of exported file (without extension) in Content-Disposition header.
+    """
+
+    export_formats = ('json', 'ndjson', 'csv')
+    export_chunk_size = DEFAULT_BATCH_SIZE
+    export_filename = 'export'
+    export_format_query_param = 'export_format'
+
+    export_writers = {
+        'json': (stream_json_array, 'application/json', 'json'),
+        'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+        'csv': (stream_csv, 'text/csv', 'csv'),
+    }
+
+    @action(methods=['get', 'post'], detail=False)
+    def export(self, request: Request):
+        export_format = request.query_params.get(self.export_format_query_param, self.export_formats[0])
+        if export_format not in self.export_formats:
+            return Response(
+                f'Invalid export format, allowed formats: {", ".join(self.export_formats)}.',
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.method == 'POST':
+            queryset = self.filterset_class(data=request.data, queryset=self.get_queryset()).qs
+        else:
+            queryset = self.filter_queryset(self.get_queryset())
+
+        writer, content_type, extension = self.export_writers[export_format]
+        response = StreamingHttpResponse(
+            writer(self._iter_export_items(queryset), encoder=encoders.JSONEncoder),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.export_filename}.{extension}"'
+        return response
+
+    def _iter_export_items(self, queryset):
+        """Yield serialized objects, they are loaded and serialized by chunks."""
+        serializer = None
+        for chunk in chunked(queryset.iterator(chunk_size=self.export_chunk_size), self.export_chunk_size):
+            if serializer is None:
+                serializer = self.get_serializer(chunk, many=True)
+            else:
+                rebind_serializer(serializer, chunk)
+            yield from serializer.data
+
+
+class ImportViewSetMixin:
+    """Add import endpoint into ViewSet, it imports rows from uploaded CSV (with header) or NDJSON file.
+
+    File is uploaded as multipart form field 'file' (format by extension of file name) or sent as request body
+    (format by Content-Type, text/csv or application/x-ndjson). Rows are parsed incrementally, validated
+    by serializer of view and written by chunked QuerySet.bulk_create (see import_utils.import_rows).
+    Empty CSV values of nullable fields are imported as null.
+    Response contains stats of import and errors of invalid rows: {"rows": n, "imported": n, "failed": n,
+    "elapsed": s, "rows_per_second": n, "errors": [{"row": row number, "errors": row errors}, ...]}.
+
+    Settings by class attribute:
+    ----------------------------
+    import_mode : str
+        insert - insert all rows, upsert - update existing rows matched by import_unique_fields.
+    import_unique_fields : list
+        Fields identifying existing rows for upsert mode (need unique constraint in database).
+    import_update_fields : list
+        Fields updated by upsert, None = all imported fields (existing rows are kept if there is none).
+    import_chunk_size : int
+        Number of rows validated and written at once.
+    import_atomic : bool
+        Import all rows in one transaction, nothing is imported if any row is invalid (response 400).
+        Otherwise every chunk is committed and invalid rows are skipped.
+    import_max_reported_errors : int
+        Max number of row errors in response, all errors are counted in "failed".
+    """
+
+    import_mode = 'insert'
+    import_unique_fields = None
+    import_update_fields = None
+    import_chunk_size = DEFAULT_BATCH_SIZE
+    import_atomic = True
+    import_max_reported_errors = 100
+    import_file_field = 'file'
+
+    import_readers = {
+        'csv': iter_csv,
+        'ndjson': iter_ndjson,
+        'jsonl': iter_ndjson,
+    }
+
+    @action(methods=['post'], detail=False, url_path='import')
+    def import_file(self, request: Request):
+        stream, file_format = self._get_import_stream(request)
+        if stream is None:
+            return Response(
+                f'Invalid data, send file in "{self.import_file_field}" field or in body '
+                f'({", ".join(self.import_readers)}).',
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        error_report = io.StringIO()  # only first import_max_reported_errors errors are written
+        try:
+            stats = import_rows(
+                self.import_readers[file_format](stream),
+                self.get_serializer(),
+                self.get_queryset(),
+                mode=self.import_mode,
+                unique_fields=self.import_unique_fields,
+                update_fields=self.import_update_fields,
+                chunk_size=self.import_chunk_size,
+                atomic=self.import_atomic,
+                error_report=error_report,
+                max_reported_errors=self.import_max_reported_errors,
+                empty_as_null=(file_format == 'csv'),
+            )
+        except InvalidData as e:
+            return Response(str(e), status=http_status.HTTP_400_BAD_REQUEST)
+        errors = [json.loads(line) for line in error_report.getvalue().splitlines()]
+
+        status = http_status.HTTP_400_BAD_REQUEST if self.import_atomic and stats.failed else http_status.HTTP_200_OK
+        return Response({**stats.as_dict(), 'errors': errors}, status=status)
+
+    def _get_import_stream(self, request: Request):
+        """Return (binary stream, format) of imported file, or (None, None) for missing file or unknown format."""
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type == 'multipart/form-data':
+            uploaded_file = request.FILES.get(self.import_file_field)
+            if uploaded_file is None:
+                return None, None
+            file_format = uploaded_file.name.rsplit('.', 1)[-1].lower()
+        elif content_type in ('text/csv', 'application/csv'):
+            uploaded_file, file_format = request.stream, 'csv'
+        elif content_type in NDJSON_MEDIA_TYPES:
+            uploaded_file, file_format = request.stream, 'ndjson'
+        else:
+            return None, None
+        if uploaded_file is None or file_format not in self.import_readers:
+            return None, None
+        return uploaded_file, file_format
+
+
+class DynamicFieldsQuerySetMixin:
+    """Load from database only fields selected by request, use it with DynamicFieldsSerializerMixin serializer.
+
+    Queryset from get_queryset is limited by QuerySet.only() to columns of selected fields, relations of selected
+    fields are loaded by select_related/prefetch_related (see DynamicFieldsSerializerMixin.get_queryset_plan).
+
+    Settings by class attribute:
+    ----------------------------
+    dynamic_fields_queryset_actions : tuple
+        Actions with limited queryset. Use only read actions, saved instances should not have deferred fields.
+    """
+
+    dynamic_fields_queryset_actions = ('list', 'retrieve', 'search')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'action', None) not in self.dynamic_fields_queryset_actions:
+            return queryset
+        serializer = self.get_serializer()
+        if isinstance(serializer, DynamicFieldsSerializerMixin):
+            queryset = serializer.optimize_queryset(queryset)
+        return queryset
+
+
+class ReplicaRoutingMixin:
+    """Route database reads of read actions to replica, with read-your-writes stickiness.
+
+    Use it with dcore.db_routers.ReplicaRouter (see its module for settings). Reads of read actions go
+    to replica, unless session (or user) of request is pinned to primary. Other actions read from primary,
+    all writes go to primary and successful write request (not safe method, response 2xx) pins session
+    and user to primary for a few seconds.
+
+    Settings by class attribute:
+    ----------------------------
+    replica_read_actions : tuple
+        Actions reading from replica. Do not add actions with streaming response (e.g. export), their
+        queries run after the action.
+    replica_sticky_seconds : int
+        How long reads stay on primary after write, None = DCORE_DB_STICKY_SECONDS setting.
+    """
+
+    replica_read_actions = ('list', 'retrieve', 'search')
+    replica_sticky_seconds = None
+
+    def initial(self, request: Request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if getattr(self, 'action', None) in self.replica_read_actions and not is_pinned_to_primary(request):
+            self._previous_read_alias = set_read_alias(choose_replica())
+
+    def finalize_response(self, request: Request, response, *args, **kwargs):
+        if '_previous_read_alias' in self.__dict__:
+            set_read_alias(self.__dict__.pop('_previous_read_alias'))
+        elif (
+            request.method not in SAFE_METHODS
+            and getattr(self, 'action', None) not in self.replica_read_actions
+            and 200 <= response.status_code < 300
+        ):
+            pin_to_primary(request, self.replica_sticky_seconds)
+        return super().finalize_response(request, response, *args, **kwargs)
+
 
 class BatchEndpointMixin:
     batch_create_method = 'create'
     batch_allow_empty_items = True
+    batch_update_method = 'save'
+    batch_replace_method = 'recreate'
+    batch_lookup_fields = None
+    batch_chunk_size = DEFAULT_BATCH_SIZE
+    batch_streaming = False
+    batch_async = False
+    batch_job_max_errors = 100
 
     @action(methods=['put', 'post', 'patch'], detail=False)
     def batch(self, request: Request):
@@ -44,85 +467,508 @@ class BatchEndpointMixin:
         POST - add new items to collection, keep old items
         PATCH - update sent items
             - you have to pass PK for each item, if PK is missing (or entity does not exist), item is ignored.
+            - all items are loaded by one query and validated against loaded instances.
 
         You can use query_params to filter collection.
 
         Settings by class attribute:
         ----------------------------
         batch_create_method : string
-            Method to use on queryset to create new items - create/get_or_create
+            Method to use on queryset to create new items:
+            - create/get_or_create - one query (or two) per item, Model.save() is called
+            - bulk_create - insert items in chunks by QuerySet.bulk_create
+            - bulk_get_or_create - find existing items by one query (per chunk) keyed on batch_lookup_fields,
+              insert only missing items by QuerySet.bulk_create
+        batch_update_method : string
+            Method to save updated items (PATCH):
+            - save - call serializer.save() for each item
+            - bulk_update - save all items by QuerySet.bulk_update limited to changed fields,
+              serializer.save() and Model.save() are NOT called
+        batch_replace_method : string
+            Method to replace collection (PUT):
+            - recreate - create all items by batch_create_method, delete all other items
+            - diff - match items with existing items by batch_lookup_fields (natural key), then insert new items,
+              update changed items, delete missing items by chunked bulk queries and keep unchanged items untouched.
+              Model.save() is NOT called.
+        batch_lookup_fields : list
+            Fields to find existing items with batch_create_method bulk_get_or_create
+            (if None, all fields of item are used as in get_or_create) or with batch_replace_method diff.
+        batch_chunk_size : int
+            Max number of items processed by one bulk query (or in one chunk in streaming mode).
+        batch_streaming : bool
+            Parse items incrementally from request body and validate and save them in chunks of batch_chunk_size,
+            each chunk in its own transaction (savepoint), so memory usage does not depend on size of request.
+            Body is JSON object with "items" field or NDJSON (one item per line, Content-Type application/x-ndjson).
+            Supported only for POST and PATCH. Response contains number of saved items: {"count": n},
+            on invalid chunk processing stops and response contains also errors of the chunk:
+            {"count": n, "errors": [{"index": item index, "errors": item errors}, ...]}.
+        batch_async : bool
+            Persist POST and PATCH requests as jobs (dcore.batch_jobs.models.BatchJob) and respond immediately
+            by 202 Accepted with state of job. Job is executed in chunks of batch_chunk_size by local thread pool
+            or by worker (see dcore.batch_jobs.jobs), each chunk in its own transaction, invalid items are skipped.
+            Database error (e.g. IntegrityError) skips its chunk, PATCH items without existing object are skipped too,
+            all skipped items are reported in errors. Client polls batch-jobs/<job id>/ endpoint for progress,
+            errors of items ({"index": item index, "errors": item errors}) and result ({"count": n}).
+            PUT is processed synchronously. Requires "dcore.batch_jobs" in INSTALLED_APPS.
+        batch_job_max_errors : int
+            Max number of item errors stored in job, all invalid items are counted in "failed".
         """
-        assert self.batch_create_method in ['create', 'get_or_create'], \
-            'Invalid value in "batch_create_method" field.'
+        self._assert_batch_settings()
+
+        if self.batch_async and request.method in ['POST', 'PATCH']:
+            return self._enqueue_batch_job(request)
 
-        response = {'errors': [], 'items': []}
-        qs = self.get_queryset()
-        pk_field_name = qs.model._meta.pk.name
+        if self.batch_streaming:
+            return self._stream_batch(request)
 
+        items, error_response = self._get_batch_request_items(request)
+        if error_response is not None:
+            return error_response
+
+        qs = self._filter_batch_queryset(request, self.get_queryset())
+
+        # Load updated (or replaced) instances, missing instance is None
+        existing = None
+        instances = [None] * len(items)
+        if request.method == 'PATCH':
+            instances = self._get_batch_instances(qs, items)
+        elif request.method == 'PUT' and self.batch_replace_method == 'diff':
+            existing = load_by_natural_key(qs, self.batch_lookup_fields, batch_size=self.batch_chunk_size)
+            instances = self._get_batch_replaced_instances(qs, items, existing[0])
+
+        # Validate all:
+        serializer, validated_items, errors = self._validate_batch_items(
+            items, instances, partial=(request.method == 'PATCH')
+        )
+        if any(item_errors is not None for item_errors in errors):
+            return Response({'errors': errors}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        response_items = self._save_batch_items(request, qs, items, instances, existing, serializer, validated_items)
+        return Response({'items': response_items}, status=http_status.HTTP_200_OK)
+
+    def _assert_batch_settings(self):
+        assert self.batch_create_method in ['create', 'get_or_create', 'bulk_create', 'bulk_get_or_create'], \
+            'Invalid value in "batch_create_method" field.'
+        assert self.batch_update_method in ['save', 'bulk_update'], \
+            'Invalid value in "batch_update_method" field.'
+        assert self.batch_replace_method in ['recreate', 'diff'], \
+            'Invalid value in "batch_replace_method" field.'
+        assert self.batch_replace_method != 'diff' or self.batch_lookup_fields, \
+            'Field "batch_lookup_fields" is required for "diff" batch_replace_method.'
+
+    def _get_batch_request_items(self, request: Request):
+        """Return (items from request data, None) or (None, error response)."""
         data: dict = request.data
         if type(data) is not dict:
             data = data.dict()
         items = data.get('items', None)
 
         if items is None:
-            return Response('Invalid data, missing "items" field in data.', status=http_status.HTTP_400_BAD_REQUEST)
-
+            return None, Response(
+                'Invalid data, missing "items" field in data.', status=http_status.HTTP_400_BAD_REQUEST
+            )
         if not isinstance(items, list):
-            return Response('Invalid data, "items" field has to be list.', status=http_status.HTTP_400_BAD_REQUEST)
-
+            return None, Response(
+                'Invalid data, "items" field has to be list.', status=http_status.HTTP_400_BAD_REQUEST
+            )
         if len(items) == 0 and not self.batch_allow_empty_items:
+            return None, Response('Invalid data, "items" list is empty.', status=http_status.HTTP_400_BAD_REQUEST)
+        return items, None
+
+    def _save_batch_items(self, request: Request, qs, items, instances, existing, serializer, validated_items):
+        """Save validated items by request method and return serialized items for response."""
+        # replace items
+        if request.method == 'PUT' and self.batch_replace_method == 'diff':
+            self._assert_bulk_insert_returns_pks(qs)
+            replaced_objs = bulk_replace(
+                qs,
+                [validated_data for __, validated_data in validated_items],
+                self.batch_lookup_fields,
+                batch_size=self.batch_chunk_size,
+                existing=existing,
+            )
+            return self.get_serializer(replaced_objs, many=True).data
+
+        # create items
+        if request.method in ['PUT', 'POST']:
+            created_objs = self._create_batch_items(qs, items)
+            response_items = self.get_serializer(created_objs, many=True).data
+            # delete old items
+            if request.method == 'PUT':
+                created_pks = [created_obj.pk for created_obj in created_objs]
+                qs.filter(~Q(pk__in=created_pks)).delete()
+            return response_items
+
+        # update items
+        updated_objs = self._update_batch_items(qs, serializer, [
+            validated_item for validated_item in validated_items if validated_item[0] is not None
+        ])
+        updated_data = iter(self.get_serializer(updated_objs, many=True).data)
+        return [None if instance is None else next(updated_data) for instance in instances]
+
+    @action(methods=['get'], detail=False, url_path=r'batch-jobs/(?P<job_id>[0-9a-f-]{36})')
+    def batch_job(self, request: Request, job_id=None):
+        """Return state of batch job created by this view (and user), see batch_async."""
+        from .batch_jobs.jobs import get_job_view_path
+        from .batch_jobs.models import BatchJob
+
+        user = request.user if request.user is not None and request.user.is_authenticated else None
+        try:
+            job = BatchJob.objects.get(pk=job_id, view=get_job_view_path(self), user=user)
+        except (BatchJob.DoesNotExist, ValidationError):
+            return Response('Batch job does not exist.', status=http_status.HTTP_404_NOT_FOUND)
+        return Response(job.as_dict())
+
+    def _enqueue_batch_job(self, request: Request):
+        """Batch endpoint with batch_async, see batch method."""
+        from .batch_jobs.jobs import enqueue_job
+
+        items, error_response = self._get_batch_request_items(request)
+        if error_response is not None:
+            return error_response
+
+        job = enqueue_job(self, request, items)
+        headers = {}
+        try:
+            headers['Location'] = self.reverse_action('batch-job', kwargs={'job_id': str(job.pk)})
+        except (AttributeError, NoReverseMatch):
+            pass  # view is not registered by router
+        return Response(job.as_dict(), status=http_status.HTTP_202_ACCEPTED, headers=headers)
+
+    def run_batch_job(self, job) -> dict:
+        """Process items of batch job in chunks (called by dcore.batch_jobs.jobs.run_job), return result of job.
+
+        Every chunk is saved in its own transaction together with progress of job, invalid items are skipped.
+        Database error of chunk (e.g. IntegrityError) rolls back only the chunk, its valid items are counted
+        as failed with message of the error. Items of PATCH without existing object are failed too.
+        Requeued job continues after the last saved chunk.
+        """
+        qs = self._filter_batch_queryset(self.request, self.get_queryset())
+        partial = job.method == 'PATCH'
+        count = (job.result or {}).get('count', 0)
+        processed = job.processed
+        failed = job.failed
+        errors = list(job.errors)
+        for items in chunked(job.items[processed:], self.batch_chunk_size):
+            instances = self._get_batch_instances(qs, items) if partial else [None] * len(items)
+            serializer, validated_items, items_errors = self._validate_batch_items(items, instances, partial=partial)
+            if partial:
+                items_errors = [
+                    {api_settings.NON_FIELD_ERRORS_KEY: ['Object does not exist.']}
+                    if item_errors is None and instance is None else item_errors
+                    for instance, item_errors in zip(instances, items_errors)
+                ]
+            valid_indexes = [index for index, item_errors in enumerate(items_errors) if item_errors is None]
+            try:
+                with transaction.atomic(using=qs.db):
+                    if partial:
+                        saved = self._update_batch_items(qs, serializer, [
+                            validated_items[index] for index in valid_indexes
+                        ])
+                    elif valid_indexes:
+                        saved = self._create_batch_items(qs, [items[index] for index in valid_indexes])
+                    else:
+                        saved = []
+                    progress = self._add_batch_job_errors(processed, failed, errors, items_errors)
+                    self._save_batch_job_progress(job, qs.db, *progress, count + len(saved))
+            except DatabaseError as e:
+                logger.warning('Chunk of batch job %s failed.', job.pk, exc_info=True)
+                saved = []
+                items_errors = [
+                    {api_settings.NON_FIELD_ERRORS_KEY: [str(e)]} if item_errors is None else item_errors
+                    for item_errors in items_errors
+                ]
+                progress = self._add_batch_job_errors(processed, failed, errors, items_errors)
+                self._save_batch_job_progress(job, qs.db, *progress, count)
+            processed, failed, errors = progress
+            count += len(saved)
+        return {'count': count}
+
+    def _add_batch_job_errors(self, processed: int, failed: int, errors: list, items_errors: list) -> tuple:
+        """Return (processed, failed, errors) of job after chunk with items_errors (None for saved item)."""
+        errors = list(errors)
+        for index, item_errors in enumerate(items_errors):
+            if item_errors is not None:
+                failed += 1
+                if len(errors) < self.batch_job_max_errors:
+                    errors.append({'index': processed + index, 'errors': item_errors})
+        return processed + len(items_errors), failed, errors
+
+    @staticmethod
+    def _save_batch_job_progress(job, using, processed: int, failed: int, errors: list, count: int):
+        """Store progress of job (in transaction of chunk, so requeued job continues after the last saved chunk)."""
+        from .batch_jobs.models import BatchJob
+
+        BatchJob.objects.using(using).filter(pk=job.pk).update(
+            processed=processed, failed=failed, errors=errors, result={'count': count}, updated=timezone.now()
+        )
+
+    def _stream_batch(self, request: Request):
+        """Batch endpoint with batch_streaming, see batch method."""
+        if request.method not in ['POST', 'PATCH']:
+            return Response(
+                f'Method {request.method} is not supported by streaming batch.',
+                status=http_status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+
+        qs = self._filter_batch_queryset(request, self.get_queryset())
+        count = 0
+        try:
+            for items in chunked(iter_request_items(request, key='items'), self.batch_chunk_size):
+                if request.method == 'PATCH':
+                    instances = self._get_batch_instances(qs, items)
+                else:
+                    instances = [None] * len(items)
+                serializer, validated_items, errors = self._validate_batch_items(
+                    items, instances, partial=(request.method == 'PATCH')
+                )
+                if any(item_errors is not None for item_errors in errors):
+                    response = {
+                        'count': count,
+                        'errors': [
+                            {'index': count + index, 'errors': item_errors}
+                            for index, item_errors in enumerate(errors) if item_errors is not None
+                        ],
+                    }
+                    return Response(response, status=http_status.HTTP_400_BAD_REQUEST)
+
+                with transaction.atomic(using=qs.db):
+                    if request.method == 'POST':
+                        self._create_batch_items(qs, items)
+                    else:
+                        self._update_batch_items(qs, serializer, [
+                            validated_item for validated_item in validated_items if validated_item[0] is not None
+                        ])
+                count += len(items)
+        except InvalidData as e:
+            return Response(str(e), status=http_status.HTTP_400_BAD_REQUEST)
+
+        if count == 0 and not self.batch_allow_empty_items:
             return Response('Invalid data, "items" list is empty.', status=http_status.HTTP_400_BAD_REQUEST)
+        return Response({'count': count}, status=http_status.HTTP_200_OK)
 
-        # Validate all:
-        any_error = False
-        for item in items:
-            serializer = self.get_serializer(data=item, partial=(request.method == 'PATCH'))
+    def _filter_batch_queryset(self, request: Request, qs):
+        """Filter collection by filterset_class (if defined) with query_params."""
+        if filter_class := getattr(self, 'filterset_class', None):
+            filter_obj = filter_class(data=request.query_params, queryset=qs)
+            qs = filter_obj.qs
+        return qs
+
+    def _validate_batch_items(self, items: list, instances: list, partial: bool):
+        """Validate items (against instances) by one shared serializer.
+
+        Returns:
+            tuple: (shared serializer, [(instance, validated data), ...], [errors or None for valid item, ...])
+        """
+        serializer = self.get_serializer(partial=partial)
+        validated_items = []
+        errors = []
+        for item, instance in zip(items, instances):
+            rebind_serializer(serializer, instance, data=item)
             if not serializer.is_valid():
-                any_error = True
                 serializer_errors = serializer.errors
                 if isinstance(serializer_errors, dict) and 'errors' in serializer_errors:
-                    response['errors'].append(serializer_errors['errors'])
+                    errors.append(serializer_errors['errors'])
                 else:
-                    response['errors'].append(serializer_errors)
+                    errors.append(serializer_errors)
+                validated_items.append((instance, None))
             else:
-                response['errors'].append(None)
+                errors.append(None)
+                validated_items.append((instance, serializer.validated_data))
+        return serializer, validated_items, errors
 
-        if any_error:
-            del response['items']
-            return Response(response, status=http_status.HTTP_400_BAD_REQUEST)
-        else:
-            del response['errors']
+    def _get_batch_instances(self, qs, items: list) -> list:
+        """Load instances for items by one query and return them in order of items (None for missing instance)."""
+        pk_values = self._get_batch_pk_values(qs, items)
+        instances_by_pk = qs.in_bulk([pk_value for pk_value in pk_values if pk_value is not None])
+        return [instances_by_pk.get(pk_value) for pk_value in pk_values]
 
-        # Use filters
-        if filter_class := getattr(self, 'filterset_class', None):
-            filter_obj = filter_class(data=request.query_params, queryset=qs)
-            qs = filter_obj.qs
+    def _get_batch_pk_values(self, qs, items: list) -> list:
+        """Return PK values of items (None for item without valid PK)."""
+        pk_field = qs.model._meta.pk
+        pk_values = []
+        for item in items:
+            try:
+                pk_values.append(pk_field.to_python(item.get(pk_field.name)) if isinstance(item, dict) else None)
+            except ValidationError:
+                pk_values.append(None)
+        return pk_values
 
-        # create items
-        if request.method in ['PUT', 'POST']:
-            created_pks = []
-            for item_data in items:
-                if self.batch_create_method == 'create':
-                    created_obj = qs.create(**item_data)
-                elif self.batch_create_method == 'get_or_create':
-                    created_obj, __ = qs.get_or_create(**item_data)
-                created_pks.append(created_obj.pk)
-                response['items'].append(self.get_serializer(created_obj).data)
-            # delete old items
-            if request.method == 'PUT':
-                qs.filter(~Q(pk__in=created_pks)).delete()
+    def _get_batch_replaced_instances(self, qs, items: list, existing_by_key: dict) -> list:
+        """Return existing instances matched with items by natural key (None for missing instance)."""
+        key_fields = [qs.model._meta.get_field(name) for name in self.batch_lookup_fields]
+        instances = []
+        for item in items:
+            try:
+                key = natural_key(key_fields, item) if isinstance(item, dict) else None
+                instances.append(existing_by_key.get(key))
+            except ValidationError:
+                instances.append(None)
+        return instances
 
-        # update items
+    def _update_batch_items(self, qs, serializer, validated_items: list) -> list:
+        """Save validated items [(instance, validated data), ...] by batch_update_method, return updated objects."""
+        if self.batch_update_method == 'save':
+            return [
+                save_validated_data(serializer, instance, validated_data)
+                for instance, validated_data in validated_items
+            ]
+
+        changed_fields = set()
+        many_to_many = []
+        for instance, validated_data in validated_items:
+            item_changed_fields, item_many_to_many = assign_validated_data(instance, validated_data)
+            changed_fields |= item_changed_fields
+            many_to_many += [(instance, field_name, value) for field_name, value in item_many_to_many]
+        # Items with the same PK share one instance
+        instances = list({instance.pk: instance for instance, __ in validated_items}.values())
+        with transaction.atomic(using=qs.db):
+            bulk_update_instances(qs, instances, changed_fields, batch_size=self.batch_chunk_size)
+            for instance, field_name, value in many_to_many:
+                getattr(instance, field_name).set(value)
+        return [instance for instance, __ in validated_items]
+
+    def _create_batch_items(self, qs, items: list) -> list:
+        """Create items by batch_create_method and return created (or found) objects in order of items."""
+        if self.batch_create_method == 'create':
+            return [qs.create(**item_data) for item_data in items]
+        if self.batch_create_method == 'get_or_create':
+            return [qs.get_or_create(**item_data)[0] for item_data in items]
+
+        self._assert_bulk_insert_returns_pks(qs)
+        if self.batch_create_method == 'bulk_create':
+            objects = qs.bulk_create([qs.model(**item_data) for item_data in items], batch_size=self.batch_chunk_size)
+            bulk_changed.send(sender=qs.model, using=qs.db)
+            return objects
+        return bulk_get_or_create(qs, items, self.batch_lookup_fields, batch_size=self.batch_chunk_size)
+
+    def _assert_bulk_insert_returns_pks(self, qs):
+        """Bulk methods need PKs of inserted items (for response and to keep them in PUT)."""
+        assert connections[qs.db].features.can_return_rows_from_bulk_insert, \
+            'Database does not return PKs from bulk insert, bulk batch methods are not supported.'
+
+
+class AsyncSearchViewSetMixin(SearchViewSetMixin):
+    """Async variant of SearchViewSetMixin, use it with async ViewSet of adrf package.
+
+    Count and keyset page are loaded by async ORM, cache is used by async cache API. Filtering (validation
+    of filterset), page of paginator and serialization may query database, they run in sync thread (sync_to_async).
+    Settings are the same as in SearchViewSetMixin.
+    """
+
+    @action(methods=["post"], detail=False)
+    async def search(self, request: Request):
+        """Async search endpoint, see SearchViewSetMixin.search."""
+        assert self.search_pagination in ['page', 'keyset']
+        assert self.search_count_strategy in ASYNC_COUNT_STRATEGIES
+
+        if not self.search_cache_timeout:
+            return await self._asearch_response(request)
+
+        assert are_models_tracked(self.get_search_cache_models()), \
+            'Cache of search requires tracked models (DCORE_MODEL_GENERATIONS_MODELS setting).'
+        cache = caches[self.search_cache_alias]
+        cache_key = await sync_to_async(self.get_search_response_cache_key)(request)
+        data = await cache.aget(cache_key)
+        if data is not None:
+            return Response(data)
+        response = await self._asearch_response(request)
+        if response.status_code == http_status.HTTP_200_OK:
+            await cache.aset(cache_key, response.data, self.search_cache_timeout)
+        return response
+
+    async def _asearch_response(self, request: Request):
+        queryset = await sync_to_async(self.get_search_queryset)(request)
+
+        if self.search_pagination == 'keyset':
+            return await self._akeyset_search_response(request, queryset)
+
+        count_exact = True
+        if self.paginator is not None and (
+            self.search_count_strategy != 'exact' or self.search_count_cache_timeout
+        ):
+            # The same condition as in sync variant, otherwise paginator counts (if it needs count at all).
+            count, count_exact = await self.aget_search_count(request, queryset)
+            queryset = with_known_count(queryset, count)
+        return await sync_to_async(self._page_search_response)(queryset, count_exact)
+
+    async def aget_search_count(self, request: Request, queryset) -> Tuple[int, bool]:
+        """Async variant of get_search_count."""
+        count_function = ASYNC_COUNT_STRATEGIES[self.search_count_strategy]
+        if not self.search_count_cache_timeout:
+            return await count_function(queryset, self.search_count_cap)
+
+        cache = caches[self.search_cache_alias]
+        key = await sync_to_async(self._get_search_count_cache_key)(request)
+        result = await cache.aget(key)
+        if result is None:
+            result = await count_function(queryset, self.search_count_cap)
+            await cache.aset(key, result, self.search_count_cache_timeout)
+        return tuple(result)
+
+    async def _akeyset_search_response(self, request: Request, queryset):
+        try:
+            objects, next_cursor = await apaginate_keyset(
+                queryset,
+                self.get_search_page_size(),
+                cursor=request.query_params.get(self.search_cursor_query_param),
+                ordering=self.search_keyset_ordering,
+            )
+        except InvalidData as e:
+            return Response(str(e), status=http_status.HTTP_400_BAD_REQUEST)
+
+        def get_results():
+            return self.get_serializer(objects, many=True).data
+
+        return Response({'next': next_cursor, 'results': await sync_to_async(get_results)()})
+
+
+class AsyncBatchEndpointMixin(BatchEndpointMixin):
+    """Async variant of BatchEndpointMixin, use it with async ViewSet of adrf package.
+
+    Filtered collection, updated (PATCH) instances are loaded by async ORM. Validation and saving may query
+    database (and use transactions), they run in sync thread (sync_to_async). Requests with batch_streaming
+    or batch_async are processed by BatchEndpointMixin.batch in sync thread.
+    Settings are the same as in BatchEndpointMixin.
+    """
+
+    @action(methods=['put', 'post', 'patch'], detail=False)
+    async def batch(self, request: Request):
+        """Async batch endpoint, see BatchEndpointMixin.batch."""
+        self._assert_batch_settings()
+        if self.batch_streaming or (self.batch_async and request.method in ['POST', 'PATCH']):
+            return await sync_to_async(super().batch)(request)
+
+        items, error_response = self._get_batch_request_items(request)
+        if error_response is not None:
+            return error_response
+
+        qs = await sync_to_async(self._filter_batch_queryset)(request, self.get_queryset())
+
+        # Load updated (or replaced) instances, missing instance is None
+        existing = None
+        instances = [None] * len(items)
         if request.method == 'PATCH':
-            for item in items:
-                try:
-                    instance = qs.get(**{f'{pk_field_name}': item.get(pk_field_name)})
-                except qs.model.DoesNotExist:
-                    response['items'].append(None)
-                    continue
-                serializer = self.get_serializer(instance, data=item, partial=True)
-                serializer.is_valid(raise_exception=True)
-                serializer.save()
-                response['items'].append(serializer.data)
-
-        return Response(response, status=http_status.HTTP_200_OK)
+            instances = await self._aget_batch_instances(qs, items)
+        elif request.method == 'PUT' and self.batch_replace_method == 'diff':
+            existing = await sync_to_async(load_by_natural_key)(
+                qs, self.batch_lookup_fields, batch_size=self.batch_chunk_size
+            )
+            instances = self._get_batch_replaced_instances(qs, items, existing[0])
+
+        serializer, validated_items, errors = await sync_to_async(self._validate_batch_items)(
+            items, instances, partial=(request.method == 'PATCH')
+        )
+        if any(item_errors is not None for item_errors in errors):
+            return Response({'errors': errors}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        response_items = await sync_to_async(self._save_batch_items)(
+            request, qs, items, instances, existing, serializer, validated_items
+        )
+        return Response({'items': response_items}, status=http_status.HTTP_200_OK)
+
+    async def _aget_batch_instances(self, qs, items: list) -> list:
+        """Async variant of _get_batch_instances."""
+        pk_values = self._get_batch_pk_values(qs, items)
+        instances_by_pk = await qs.ain_bulk([pk_value for pk_value in pk_values if pk_value is not None])
+        return [instances_by_pk.get(pk_value) for pk_value in pk_values]
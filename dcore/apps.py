@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class DcoreConfig(AppConfig):
     name = 'dcore'
+
+    def ready(self):
+        if getattr(settings, 'DCORE_MODEL_GENERATIONS', False):
+            from .model_generations import connect_signals
+            connect_signals()
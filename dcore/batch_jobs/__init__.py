@@ -0,0 +1,4 @@
+"""Optional app with asynchronous batch jobs (BatchEndpointMixin.batch_async).
+
+Add "dcore.batch_jobs" into INSTALLED_APPS to use it.
+"""
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class BatchJobsConfig(AppConfig):
+    name = 'dcore.batch_jobs'
+    label = 'dcore_batch_jobs'
+    verbose_name = 'Batch jobs'
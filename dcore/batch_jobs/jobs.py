@@ -0,0 +1,151 @@
+"""Asynchronous processing of batch requests, without external broker.
+
+Accepted request is persisted as BatchJob and executed later by:
+- thread - bounded pool of threads in web process, job is submitted after commit of transaction (default).
+  Pool lives in memory only, jobs pending or running at restart of process stay in database and are
+  executed only by management command run_batch_jobs (use --requeue-after for interrupted running jobs).
+- worker - jobs are only stored in database (local queue), run them by management command run_batch_jobs.
+
+Settings:
+- DCORE_BATCH_JOBS_EXECUTOR = 'thread' or 'worker', default 'thread'.
+- DCORE_BATCH_JOBS_THREADS = Max number of jobs executed in parallel by one process, default 2.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+
+from ..enums import BatchJobStatuses
+from .models import BatchJob
+
+
+logger = logging.getLogger(__name__)
+
+EXECUTORS = ('thread', 'worker')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor_name() -> str:
+    executor = getattr(settings, 'DCORE_BATCH_JOBS_EXECUTOR', 'thread')
+    assert executor in EXECUTORS, 'Invalid value in DCORE_BATCH_JOBS_EXECUTOR setting.'
+    return executor
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DCORE_BATCH_JOBS_THREADS', 2),
+                thread_name_prefix='dcore-batch-job',
+            )
+        return _executor
+
+
+def _run_job_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()  # connections of this thread
+
+
+def get_job_view_path(view) -> str:
+    """Return dotted path to class of view, job is executed by this class."""
+    return f'{type(view).__module__}.{type(view).__qualname__}'
+
+
+def enqueue_job(view, request: Request, items: list) -> BatchJob:
+    """Persist batch request as job, it is executed after commit of current transaction (thread executor)."""
+    user = getattr(request, 'user', None)
+    job = BatchJob.objects.create(
+        view=get_job_view_path(view),
+        method=request.method,
+        query_params={key: request.query_params.getlist(key) for key in request.query_params},
+        items=items,
+        user=user if user is not None and user.is_authenticated else None,
+        total=len(items),
+    )
+    if get_executor_name() == 'thread':
+        transaction.on_commit(lambda: _get_thread_pool().submit(_run_job_in_thread, job.pk))
+    return job
+
+
+def build_job_view(job: BatchJob):
+    """Return instance of job view with request rebuilt from job (method, query params, user)."""
+    http_request = HttpRequest()
+    http_request.method = job.method
+    query_params = QueryDict(mutable=True)
+    for key, values in job.query_params.items():
+        query_params.setlist(key, values)
+    http_request.GET = query_params
+
+    request = Request(http_request)
+    if job.user is not None:
+        request.user = job.user
+
+    view = import_string(job.view)()
+    view.request = request
+    view.args = ()
+    view.kwargs = {}
+    view.format_kwarg = None
+    view.action = 'batch'
+    return view
+
+
+def claim_job(job_id) -> bool:
+    """Mark pending job as running, return False if job is claimed by another worker."""
+    return BatchJob.objects.filter(pk=job_id, status=BatchJobStatuses.pending.value).update(
+        status=BatchJobStatuses.running.value, started=timezone.now(), updated=timezone.now()
+    ) == 1
+
+
+def run_job(job_id) -> bool:
+    """Claim and execute job, return False if job was not pending.
+
+    Job is executed by run_batch_job method of its view (see BatchEndpointMixin), unexpected
+    exception fails the job.
+    """
+    if not claim_job(job_id):
+        return False
+    job = BatchJob.objects.select_related('user').get(pk=job_id)
+    try:
+        result = build_job_view(job).run_batch_job(job)
+    except Exception as e:
+        logger.exception('Batch job %s failed.', job_id)
+        BatchJob.objects.filter(pk=job_id).update(
+            status=BatchJobStatuses.failed.value, message=str(e), finished=timezone.now(), updated=timezone.now()
+        )
+    else:
+        BatchJob.objects.filter(pk=job_id).update(
+            status=BatchJobStatuses.succeeded.value, result=result, finished=timezone.now(), updated=timezone.now()
+        )
+    return True
+
+
+def run_pending_jobs(limit: Optional[int] = None) -> int:
+    """Execute pending jobs (the oldest first), return number of executed jobs."""
+    executed = 0
+    while limit is None or executed < limit:
+        job_id = BatchJob.objects.filter(status=BatchJobStatuses.pending.value).values_list('pk', flat=True).first()
+        if job_id is None:
+            break
+        if run_job(job_id):
+            executed += 1
+    return executed
+
+
+def requeue_stale_jobs(timeout: int) -> int:
+    """Return running jobs without progress for timeout seconds (e.g. killed worker) into queue."""
+    return BatchJob.objects.filter(
+        status=BatchJobStatuses.running.value, updated__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status=BatchJobStatuses.pending.value, updated=timezone.now())
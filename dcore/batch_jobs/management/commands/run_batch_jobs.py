@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...jobs import requeue_stale_jobs, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Execute pending batch jobs (see dcore.batch_jobs.jobs) stored in database. Without --once the command runs '
+        'as worker and polls database for new jobs. More workers can run in parallel, every job is claimed '
+        'by one of them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Execute pending jobs and exit.')
+        parser.add_argument('--sleep', type=float, default=1, help='Seconds to wait when queue is empty.')
+        parser.add_argument(
+            '--requeue-after', type=int, default=None,
+            help='Requeue running jobs without progress for this number of seconds (e.g. after killed worker).',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            if options['requeue_after'] is not None:
+                requeued = requeue_stale_jobs(options['requeue_after'])
+                if requeued:
+                    self.stdout.write(f'Requeued {requeued} stale jobs.')
+            executed = run_pending_jobs()
+            if executed:
+                self.stdout.write(f'Executed {executed} jobs.')
+            if options['once']:
+                break
+            if not executed:
+                time.sleep(options['sleep'])
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:16
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('view', models.CharField(
+                    help_text='Dotted path to class of view processing the job.', max_length=255
+                )),
+                ('method', models.CharField(max_length=10)),
+                ('query_params', models.JSONField(blank=True, default=dict)),
+                ('items', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(
+                    choices=[
+                        ('pending', 'pending'),
+                        ('running', 'running'),
+                        ('succeeded', 'succeeded'),
+                        ('failed', 'failed'),
+                    ],
+                    db_index=True,
+                    default='pending',
+                    max_length=20,
+                )),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('message', models.TextField(blank=True, default='')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(
+                    blank=True,
+                    null=True,
+                    on_delete=django.db.models.deletion.CASCADE,
+                    to=settings.AUTH_USER_MODEL,
+                )),
+            ],
+            options={
+                'ordering': ('created',),
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+from ..enums import BatchJobStatuses
+
+
+class BatchJob(models.Model):
+    """Batch request accepted for asynchronous processing (see jobs module and BatchEndpointMixin.batch_async)."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    view = models.CharField(max_length=255, help_text='Dotted path to class of view processing the job.')
+    method = models.CharField(max_length=10)
+    query_params = models.JSONField(default=dict, blank=True)
+    items = models.JSONField(default=list, blank=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE)
+    status = models.CharField(
+        max_length=20, choices=BatchJobStatuses.choices(), default=BatchJobStatuses.pending.value, db_index=True
+    )
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    message = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('created',)
+
+    def __str__(self):
+        return f'{self.view} {self.method} ({self.status})'
+
+    def as_dict(self) -> dict:
+        """Return state of job for status endpoint, without items."""
+        return {
+            'id': str(self.id),
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'failed': self.failed,
+            'errors': self.errors,
+            'result': self.result,
+            'message': self.message,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
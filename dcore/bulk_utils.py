@@ -0,0 +1,246 @@
+from typing import Iterable, List, Sequence, Set, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, models, transaction
+from django.db.models import Q
+from django.db.models.query import QuerySet
+
+from .signals import bulk_changed
+from .utils import DEFAULT_BATCH_SIZE, chunked
+
+
+def assign_validated_data(instance: models.Model, validated_data: dict) -> Tuple[Set[str], List[Tuple[str, list]]]:
+    """Set validated data from serializer on instance without saving it.
+
+    Works as ModelSerializer.update, but does not call instance.save().
+
+    Returns:
+        tuple: (names of changed concrete fields, [(many-to-many field name, value), ...])
+    """
+    many_to_many_fields = {field.name for field in instance._meta.many_to_many}
+    changed_fields = set()
+    many_to_many = []
+    for attr, value in validated_data.items():
+        if attr in many_to_many_fields:
+            many_to_many.append((attr, value))
+        else:
+            setattr(instance, attr, value)
+            changed_fields.add(attr)
+    return changed_fields, many_to_many
+
+
+def bulk_update_instances(
+    queryset: QuerySet,
+    instances: List[models.Model],
+    field_names: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+):
+    """Save instances with QuerySet.bulk_update, limited to field_names.
+
+    Fields with auto_now (e.g. modified timestamps) are refreshed and saved too,
+    because bulk_update does not call Field.pre_save.
+    """
+    field_names = set(field_names)
+    if not instances or not field_names:
+        return
+    auto_now_fields = [field for field in queryset.model._meta.concrete_fields if getattr(field, 'auto_now', False)]
+    for field in auto_now_fields:
+        for instance in instances:
+            field.pre_save(instance, add=False)
+        field_names.add(field.name)
+    queryset.bulk_update(instances, sorted(field_names), batch_size=batch_size)
+    bulk_changed.send(sender=queryset.model, using=queryset.db)
+
+
+def _lookup_value(field: models.Field, value):
+    """Normalize value of lookup field to the form loaded from database."""
+    if isinstance(value, models.Model):
+        value = value.pk
+    return field.to_python(value)
+
+
+def _get_model_kwargs(opts, item: dict) -> Tuple[dict, List[Tuple[str, list]]]:
+    """Split item into arguments of Model() and many-to-many values, keys which are not model fields are skipped.
+
+    Raw values of relations (PKs) are assigned by attname.
+
+    Returns:
+        tuple: (arguments of Model(), [(many-to-many field name, value), ...])
+    """
+    kwargs = {}
+    many_to_many = []
+    for name, value in item.items():
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.many_to_many and not field.auto_created:
+            many_to_many.append((name, value))
+            continue
+        if not field.concrete:
+            continue
+        if field.is_relation and value is not None and not isinstance(value, models.Model):
+            name = field.attname
+        kwargs[name] = value
+    return kwargs, many_to_many
+
+
+def bulk_get_or_create(
+    queryset: QuerySet,
+    items: List[dict],
+    lookup_fields: Sequence[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[models.Model]:
+    """Set-based variant of QuerySet.get_or_create for list of items.
+
+    Existing objects are looked up by one query (per batch) keyed on lookup_fields, only missing
+    objects are inserted by QuerySet.bulk_create. Items with the same lookup values share one object.
+
+    Args:
+        queryset: Queryset to search existing objects in.
+        items: Data of objects in format for Model(**item).
+        lookup_fields: Fields used to find existing object, other fields in item are used only for new object
+            (as defaults in get_or_create). If None, all fields of item are used (as get_or_create(**item)).
+        batch_size: Max number of items looked up or inserted by one query.
+
+    Returns:
+        list: Objects in the same order as items.
+    """
+    opts = queryset.model._meta
+    item_keys = []
+    for item in items:
+        field_names = tuple(lookup_fields) if lookup_fields else tuple(sorted(item))
+        values = tuple(_lookup_value(opts.get_field(name), item.get(name)) for name in field_names)
+        item_keys.append((field_names, values))
+
+    max_query_params = connections[queryset.db].features.max_query_params
+    objects_by_key = {}
+    unique_keys = list(dict.fromkeys(item_keys))
+    for keys in chunked(unique_keys, batch_size):
+        if max_query_params:
+            chunk_size = max(1, max_query_params // max(1, max(len(field_names) for field_names, __ in keys)))
+        else:
+            chunk_size = len(keys)
+        for sub_keys in chunked(keys, chunk_size):
+            lookup = Q()
+            for field_names, values in sub_keys:
+                lookup |= Q(**dict(zip(field_names, values)))
+            all_field_names = {field_names for field_names, __ in sub_keys}
+            for obj in queryset.filter(lookup):
+                for field_names in all_field_names:
+                    values = tuple(getattr(obj, opts.get_field(name).attname) for name in field_names)
+                    objects_by_key.setdefault((field_names, values), obj)
+
+    new_objects = {}
+    for item, key in zip(items, item_keys):
+        if key not in objects_by_key and key not in new_objects:
+            new_objects[key] = queryset.model(**item)
+    queryset.bulk_create(list(new_objects.values()), batch_size=batch_size)
+    if new_objects:
+        bulk_changed.send(sender=queryset.model, using=queryset.db)
+    objects_by_key.update(new_objects)
+
+    return [objects_by_key[key] for key in item_keys]
+
+
+def delete_by_pks(queryset: QuerySet, pks: Iterable, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Delete objects from queryset by PKs in chunks (prevents too long IN lists)."""
+    for pks_chunk in chunked(pks, batch_size):
+        queryset.filter(pk__in=pks_chunk).delete()
+
+
+def natural_key(key_fields: Sequence[models.Field], item: dict) -> tuple:
+    """Return normalized natural key of item (values of key_fields)."""
+    return tuple(_lookup_value(field, item.get(field.name)) for field in key_fields)
+
+
+def load_by_natural_key(
+    queryset: QuerySet,
+    lookup_fields: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Tuple[dict, list]:
+    """Load all objects from queryset by one query and map them by natural key (lookup_fields).
+
+    Returns:
+        tuple: ({natural key: object}, [PKs of objects with duplicated natural key])
+    """
+    key_fields = [queryset.model._meta.get_field(name) for name in lookup_fields]
+    existing_by_key = {}
+    duplicated_pks = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        key = tuple(getattr(obj, field.attname) for field in key_fields)
+        if key in existing_by_key:
+            duplicated_pks.append(obj.pk)
+        else:
+            existing_by_key[key] = obj
+    return existing_by_key, duplicated_pks
+
+
+@transaction.atomic
+def bulk_replace(
+    queryset: QuerySet,
+    items: List[dict],
+    lookup_fields: Sequence[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    existing: Tuple[dict, list] = None,
+) -> List[models.Model]:
+    """Replace objects in queryset by items, changes are computed as difference.
+
+    Existing objects are loaded by one query and matched with items by natural key (lookup_fields).
+    Then only needed changes are written by chunked bulk queries:
+    - items without existing object are inserted (QuerySet.bulk_create),
+    - objects with different values than item are updated (QuerySet.bulk_update),
+    - objects without item are deleted (objects with duplicated natural key too),
+    - objects equal to item are NOT touched.
+
+    Model.save() is not called and save signals are not sent. Many-to-many values are set by
+    RelatedManager.set() of every object (query per object), keys which are not model fields are ignored.
+
+    Args:
+        queryset: Queryset with replaced collection.
+        items: Data of objects (e.g. validated data of serializer), related objects can be given also by PK.
+        lookup_fields: Fields of natural key to match items with existing objects.
+        batch_size: Max number of objects written by one query.
+        existing: Already loaded objects, output of load_by_natural_key.
+
+    Returns:
+        list: Objects in the same order as items.
+    """
+    opts = queryset.model._meta
+    key_fields = [opts.get_field(name) for name in lookup_fields]
+    if existing is None:
+        existing = load_by_natural_key(queryset, lookup_fields, batch_size=batch_size)
+    existing_by_key, duplicated_pks = existing
+
+    objects = []
+    new_objects = {}
+    updated_objects = {}
+    changed_fields = set()
+    many_to_many_values = []
+    for item in items:
+        key = natural_key(key_fields, item)
+        kwargs, many_to_many = _get_model_kwargs(opts, item)
+        obj = existing_by_key.get(key) or new_objects.get(key)
+        if obj is None:
+            obj = new_objects[key] = queryset.model(**kwargs)
+        elif obj.pk is not None:
+            for name, value in kwargs.items():
+                field = opts.get_field(name)
+                if getattr(obj, field.attname) != _lookup_value(field, value):
+                    setattr(obj, name, value)
+                    changed_fields.add(field.name)
+                    updated_objects[obj.pk] = obj
+        objects.append(obj)
+        many_to_many_values.extend((obj, name, value) for name, value in many_to_many)
+
+    used_pks = {obj.pk for obj in objects if obj.pk is not None}
+    stale_pks = duplicated_pks + [obj.pk for obj in existing_by_key.values() if obj.pk not in used_pks]
+
+    delete_by_pks(queryset, stale_pks, batch_size=batch_size)
+    bulk_update_instances(queryset, list(updated_objects.values()), changed_fields, batch_size=batch_size)
+    queryset.bulk_create(list(new_objects.values()), batch_size=batch_size)
+    if new_objects:
+        bulk_changed.send(sender=queryset.model, using=queryset.db)
+    for obj, name, value in many_to_many_values:
+        getattr(obj, name).set(value)  # after bulk_create, new objects have PK
+    return objects
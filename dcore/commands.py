@@ -1,6 +1,6 @@
 import uuid
 
-from .service import SessionStorage
+from .service import get_session_storage
 
 
 class SaveDataToSessionCommand:
@@ -10,7 +10,7 @@ class SaveDataToSessionCommand:
     """
 
     def __init__(self, session):
-        self.storage = SessionStorage(session)
+        self.storage = get_session_storage(session)
 
     def execute(self, key, value, token=None):
         """Save data to session section identified by token."""
@@ -28,7 +28,7 @@ class LoadDataFromSessionCommand:
     """Command to load data from session section organized by token."""
 
     def __init__(self, session):
-        self.storage = SessionStorage(session)
+        self.storage = get_session_storage(session)
 
     def execute(self, key, token, default=None):
         """Return data from session section identified by token."""
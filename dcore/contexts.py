@@ -1,14 +1,41 @@
-from django.urls import resolve
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+from django.utils.functional import SimpleLazyObject
+
+
+@lru_cache(maxsize=1024)
+def _resolve_names(path: str, urlconf: str) -> Tuple[Optional[str], Optional[str]]:
+    """Return (app_name, url_name) of path, cached by path and urlconf."""
+    try:
+        match = resolve(path, urlconf)
+    except Resolver404:
+        return None, None
+    return match.app_name, match.url_name
+
+
+def _get_names(request) -> Tuple[Optional[str], Optional[str]]:
+    """Return (app_name, url_name) from resolver match of request, resolve path only if it is missing."""
+    match = getattr(request, 'resolver_match', None)
+    if match is not None:
+        return match.app_name, match.url_name
+    return _resolve_names(request.path_info, getattr(request, 'urlconf', None) or settings.ROOT_URLCONF)
 
 
 def common(request):
     """Set common context to template.
 
+    Values are computed lazily, on first use in template. URL already resolved by Django
+    (request.resolver_match) is reused, otherwise resolved path is cached.
+
     Context variables:
     - app_name = Name of active django app.
     - path_name = Name of active django URL path.
     """
+    names = SimpleLazyObject(lambda: _get_names(request))
     return {
-        'app_name': resolve(request.path).app_name,
-        'path_name': resolve(request.path).url_name
+        'app_name': SimpleLazyObject(lambda: names[0]),
+        'path_name': SimpleLazyObject(lambda: names[1])
     }
@@ -0,0 +1,119 @@
+"""Routing of reads to read replica with read-your-writes stickiness.
+
+ReplicaRouter sends reads to replica only inside replica_reads() block (ReplicaRoutingMixin opens it
+for read actions of ViewSet), all other reads and all writes go to primary database. After successful
+write request the session (and user) is pinned to primary for a few seconds, so client reads its own
+writes even if replica lags behind.
+
+Settings:
+- DATABASE_ROUTERS = ['dcore.db_routers.ReplicaRouter']
+- DCORE_DB_PRIMARY = Alias of primary database, default 'default'.
+- DCORE_DB_REPLICAS = Aliases of replica databases, default [] (= all reads from primary). Replica is chosen
+  randomly for every request.
+- DCORE_DB_STICKY_SECONDS = How long reads stay on primary after write, default 5.
+- DCORE_DB_STICKY_CACHE = Alias of cache with markers of pinned users, default 'default'.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .service import get_session_storage
+
+
+STICKY_SECTION = 'dcore_db_router'
+STICKY_KEY = 'primary_until'
+
+_read_alias: ContextVar[Optional[str]] = ContextVar('dcore_read_alias', default=None)
+
+
+def get_primary_alias() -> str:
+    return getattr(settings, 'DCORE_DB_PRIMARY', 'default')
+
+
+def get_replica_aliases() -> list:
+    return list(getattr(settings, 'DCORE_DB_REPLICAS', []))
+
+
+def choose_replica() -> Optional[str]:
+    """Return alias of random replica, None if there is no replica."""
+    replicas = get_replica_aliases()
+    return random.choice(replicas) if replicas else None
+
+
+def set_read_alias(alias: Optional[str]) -> Optional[str]:
+    """Route reads of current context (thread or task) to alias (None = primary), return previous alias."""
+    previous = _read_alias.get()
+    _read_alias.set(alias)
+    return previous
+
+
+@contextmanager
+def replica_reads(alias: Optional[str] = None):
+    """Route reads inside block to replica (random one if alias is None)."""
+    previous = set_read_alias(alias or choose_replica())
+    try:
+        yield
+    finally:
+        set_read_alias(previous)
+
+
+class ReplicaRouter:
+    """Database router, reads inside replica_reads() go to replica, everything else to primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or get_primary_alias()
+
+    def db_for_write(self, model, **hints):
+        return get_primary_alias()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {get_primary_alias(), *get_replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+def _get_sticky_cache_key(user) -> str:
+    return f'dcore_db_primary:{user.pk}'
+
+
+def _get_authenticated_user(request):
+    user = getattr(request, 'user', None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def pin_to_primary(request, seconds: Optional[int] = None):
+    """Route reads of session (and user) of request to primary for seconds (default DCORE_DB_STICKY_SECONDS).
+
+    Marker is stored in session by session storage (see service.get_session_storage) and for authenticated
+    user also in cache, so clients without session cookie (e.g. token authentication) are pinned too.
+    """
+    if seconds is None:
+        seconds = getattr(settings, 'DCORE_DB_STICKY_SECONDS', 5)
+    until = time.time() + seconds
+    session = getattr(request, 'session', None)
+    if session is not None:
+        get_session_storage(session).set(STICKY_SECTION, STICKY_KEY, until)
+    user = _get_authenticated_user(request)
+    if user is not None:
+        caches[getattr(settings, 'DCORE_DB_STICKY_CACHE', 'default')].set(
+            _get_sticky_cache_key(user), until, timeout=seconds
+        )
+
+
+def is_pinned_to_primary(request) -> bool:
+    """Return True if session or user of request wrote data recently (see pin_to_primary)."""
+    now = time.time()
+    session = getattr(request, 'session', None)
+    if session is not None and get_session_storage(session).get(STICKY_SECTION, STICKY_KEY, 0) > now:
+        return True
+    user = _get_authenticated_user(request)
+    if user is not None:
+        cache = caches[getattr(settings, 'DCORE_DB_STICKY_CACHE', 'default')]
+        return (cache.get(_get_sticky_cache_key(user)) or 0) > now
+    return False
@@ -40,3 +40,12 @@ class Genders(ChoiceEnum):
 
     female = 'female'
     male = 'male'
+
+
+class BatchJobStatuses(ChoiceEnum):
+    """Enum defining states of batch job (see dcore.batch_jobs)."""
+
+    pending = 'pending'
+    running = 'running'
+    succeeded = 'succeeded'
+    failed = 'failed'
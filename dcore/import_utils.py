@@ -0,0 +1,170 @@
+import json
+import time
+from contextlib import nullcontext
+from typing import Callable, Iterable, Optional, Sequence, TextIO
+
+from django.db import transaction
+from django.db.models import QuerySet
+from rest_framework import serializers
+from rest_framework.utils import encoders
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
+
+from .exceptions import ImproperlyConfigured
+from .serializers import rebind_serializer
+from .signals import bulk_changed
+from .utils import DEFAULT_BATCH_SIZE, chunked
+
+
+IMPORT_MODES = ('insert', 'upsert')
+
+
+class ImportStats:
+    """Progress and result of import."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def drop_unique_validators(serializer: serializers.Serializer):
+    """Remove unique validators from serializer, existing rows are valid for upsert."""
+    for field in serializer.fields.values():
+        field.validators = [validator for validator in field.validators if not isinstance(validator, UniqueValidator)]
+    serializer.validators = [
+        validator for validator in serializer.validators if not isinstance(validator, UniqueTogetherValidator)
+    ]
+
+
+def import_rows(
+    rows: Iterable[dict],
+    serializer: serializers.ModelSerializer,
+    queryset: QuerySet,
+    mode: str = 'insert',
+    unique_fields: Optional[Sequence[str]] = None,
+    update_fields: Optional[Sequence[str]] = None,
+    chunk_size: int = DEFAULT_BATCH_SIZE,
+    atomic: bool = True,
+    error_report: Optional[TextIO] = None,
+    max_reported_errors: Optional[int] = None,
+    empty_as_null: bool = False,
+    progress: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """Validate rows by serializer and insert them by chunked QuerySet.bulk_create.
+
+    Rows are processed in chunks, so memory usage does not depend on number of rows.
+    Unique validators of serializer query database for every row, upsert mode drops them
+    (duplicates are resolved by database), so it is usually much faster than insert mode.
+
+    Args:
+        rows: Items of imported data, e.g. from stream_utils.iter_csv or iter_ndjson.
+        serializer: Serializer (without instance and data) validating rows, it is reused for all rows.
+            Many-to-many fields are not supported.
+        queryset: Objects are inserted by bulk_create of this queryset (e.g. view.get_queryset()).
+        mode: 'insert' or 'upsert' (rows with existing unique_fields are updated, bulk_create with update_conflicts).
+        unique_fields: Fields identifying existing rows for upsert.
+        update_fields: Fields updated for existing rows by upsert, default are all imported fields
+            except unique_fields. If there is no such field, existing rows are kept (ignore_conflicts).
+        chunk_size: Number of rows validated and written at once.
+        atomic: If True, all rows are imported in one transaction and nothing is imported if any row is invalid
+            (all rows are still validated to report all errors). If False, every chunk is committed and invalid
+            rows are skipped.
+        error_report: Text file, errors of invalid rows are written into it as NDJSON lines
+            {"row": number of row (from 1), "errors": errors of serializer}.
+        max_reported_errors: Max number of errors written into error_report, None = all.
+        empty_as_null: Replace empty string values of nullable fields by None (CSV has no null value).
+        progress: Function called with stats after every chunk.
+
+    Returns:
+        ImportStats: If atomic and there are invalid rows, imported is 0.
+    """
+    assert mode in IMPORT_MODES
+    if mode == 'upsert' and not unique_fields:
+        raise ImproperlyConfigured('Import in upsert mode requires unique_fields.')
+    if mode == 'upsert' and update_fields is not None and not update_fields:
+        raise ImproperlyConfigured('Import in upsert mode requires update_fields (or None for all imported fields).')
+
+    model = queryset.model
+    many_to_many = {field.name for field in model._meta.many_to_many}
+    if mode == 'upsert':
+        drop_unique_validators(serializer)
+    nullable_fields = {name for name, field in serializer.fields.items() if field.allow_null} if empty_as_null else ()
+    report_limit = float('inf') if max_reported_errors is None else max_reported_errors
+
+    stats = ImportStats()
+    with transaction.atomic(using=queryset.db) if atomic else nullcontext():
+        for chunk in chunked(rows, chunk_size):
+            objects = []
+            imported_fields = set()
+            for row in chunk:
+                stats.rows += 1
+                if nullable_fields:
+                    row = {
+                        key: None if value == '' and key in nullable_fields else value for key, value in row.items()
+                    }
+                rebind_serializer(serializer, data=row)
+                if not serializer.is_valid():
+                    stats.failed += 1
+                    if error_report is not None and stats.failed <= report_limit:
+                        errors = serializer.errors
+                        if isinstance(errors, dict) and 'errors' in errors:
+                            errors = errors['errors']  # friendly errors
+                        error_report.write(
+                            json.dumps({'row': stats.rows, 'errors': errors}, cls=encoders.JSONEncoder) + '\n'
+                        )
+                    continue
+                validated_data = serializer.validated_data
+                if many_to_many.intersection(validated_data):
+                    raise ImproperlyConfigured('Import does not support many-to-many fields.')
+                imported_fields.update(validated_data)
+                objects.append(model(**validated_data))
+
+            if objects and not (atomic and stats.failed):
+                _write_objects(queryset, objects, mode, unique_fields, update_fields, imported_fields, chunk_size)
+                stats.imported += len(objects)
+            if progress is not None:
+                progress(stats)
+
+        if atomic and stats.failed:
+            stats.imported = 0
+            transaction.set_rollback(True, using=queryset.db)
+    return stats
+
+
+def _write_objects(queryset, objects, mode, unique_fields, update_fields, imported_fields, batch_size):
+    if mode == 'insert':
+        queryset.bulk_create(objects, batch_size=batch_size)
+    else:
+        if update_fields is None:
+            update_fields = sorted(imported_fields - set(unique_fields))
+        if update_fields:
+            queryset.bulk_create(
+                objects,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=update_fields,
+            )
+        else:
+            queryset.bulk_create(objects, batch_size=batch_size, ignore_conflicts=True)  # nothing to update
+    bulk_changed.send(sender=queryset.model, using=queryset.db)
+
@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from ...bulk_utils import DEFAULT_BATCH_SIZE
+from ...exceptions import ImproperlyConfigured, InvalidData
+from ...import_utils import IMPORT_MODES, import_rows
+from ...stream_utils import iter_csv, iter_ndjson
+
+
+FILE_READERS = {
+    'csv': iter_csv,
+    'ndjson': iter_ndjson,
+    'jsonl': iter_ndjson,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Import rows from CSV (with header) or NDJSON file into model. Rows are validated by serializer '
+        'and inserted (or upserted) by chunked bulk_create. Errors of invalid rows are written into error report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('serializer', help='Dotted path to ModelSerializer class validating rows.')
+        parser.add_argument('path', help='Path to imported file.')
+        parser.add_argument(
+            '--format', choices=sorted(FILE_READERS), default=None,
+            help='Format of file, default is detected by extension of file.',
+        )
+        parser.add_argument('--mode', choices=IMPORT_MODES, default='insert', help='Insert or upsert rows.')
+        parser.add_argument(
+            '--unique-fields', default='', help='Comma separated fields identifying existing rows (upsert).',
+        )
+        parser.add_argument(
+            '--update-fields', default='',
+            help='Comma separated fields updated by upsert, default are all imported fields.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows written at once.')
+        parser.add_argument(
+            '--error-report', default=None, help='Path of NDJSON file with errors, default is PATH.errors.ndjson.',
+        )
+        parser.add_argument(
+            '--no-atomic', action='store_true',
+            help='Commit every chunk and skip invalid rows, by default nothing is imported if any row is invalid.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            serializer_class = import_string(options['serializer'])
+        except ImportError as e:
+            raise CommandError(f'Unknown serializer "{options["serializer"]}".') from e
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in FILE_READERS:
+            raise CommandError(f'Unknown format of file, use --format ({", ".join(sorted(FILE_READERS))}).')
+        if options['chunk_size'] < 1:
+            raise CommandError('Chunk size has to be positive number.')
+
+        model = serializer_class.Meta.model
+        error_report_path = options['error_report'] or f'{options["path"]}.errors.ndjson'
+
+        def progress(stats):
+            self.stdout.write(
+                f'{stats.rows} rows ({stats.failed} invalid) in {stats.elapsed:.1f} s, '
+                f'{stats.rows_per_second:.0f} rows/s.'
+            )
+
+        try:
+            with open(options['path'], 'rb') as stream, open(error_report_path, 'w') as error_report:
+                stats = import_rows(
+                    FILE_READERS[file_format](stream),
+                    serializer_class(),
+                    model._default_manager.all(),
+                    mode=options['mode'],
+                    unique_fields=[name for name in options['unique_fields'].split(',') if name] or None,
+                    update_fields=[name for name in options['update_fields'].split(',') if name] or None,
+                    chunk_size=options['chunk_size'],
+                    atomic=not options['no_atomic'],
+                    error_report=error_report,
+                    empty_as_null=(file_format == 'csv'),
+                    progress=progress,
+                )
+        except (OSError, InvalidData, ImproperlyConfigured) as e:
+            raise CommandError(str(e)) from e
+
+        if stats.failed:
+            self.stdout.write(self.style.WARNING(
+                f'{stats.failed} invalid rows, see {error_report_path}. Imported {stats.imported} rows.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Done, imported {stats.imported} rows in {stats.elapsed:.1f} s ({stats.rows_per_second:.0f} rows/s).'
+            ))
@@ -0,0 +1,72 @@
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.utils import timezone
+
+from ...bulk_utils import DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = (
+        'Hard delete soft-deleted (is_removed=True) items older than given number of days. '
+        'Items are deleted in chunks, every chunk in its own transaction, so the command can be '
+        'stopped and run again, it continues with remaining items.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='Model in format "app_label.ModelName".')
+        parser.add_argument('--days', type=int, default=30, help='Purge items removed more than DAYS ago.')
+        parser.add_argument(
+            '--date-field', default='modified',
+            help='Field with time of removal, e.g. "modified" of TimeStampedModel (default).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_BATCH_SIZE, help='Items deleted at once.')
+        parser.add_argument('--max-chunks', type=int, default=None, help='Stop after this number of chunks.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to sleep between chunks.')
+        parser.add_argument('--dry-run', action='store_true', help='Only print number of items to purge.')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(f'Unknown model "{options["model"]}".') from e
+        try:
+            model._meta.get_field('is_removed')
+            model._meta.get_field(options['date_field'])
+        except FieldDoesNotExist as e:
+            raise CommandError(str(e)) from e
+        if options['chunk_size'] < 1:
+            raise CommandError('Chunk size has to be positive number.')
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        queryset = model._base_manager.filter(
+            is_removed=True, **{f'{options["date_field"]}__lt': cutoff}
+        ).order_by('pk')
+
+        if options['dry_run']:
+            self.stdout.write(f'{queryset.count()} items to purge.')
+            return
+
+        purged = 0
+        chunks = 0
+        last_pk = None
+        while options['max_chunks'] is None or chunks < options['max_chunks']:
+            chunk_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            pks = list(chunk_queryset.values_list('pk', flat=True)[:options['chunk_size']])
+            if not pks:
+                break
+            with transaction.atomic():
+                # Filters are repeated, item restored after loading of pks is not deleted.
+                __, deleted = queryset.filter(pk__in=pks).delete()
+            purged += deleted.get(model._meta.label, 0)  # without cascaded related objects
+            chunks += 1
+            last_pk = pks[-1]
+            self.stdout.write(f'Purged {purged} items (last pk: {last_pk}).')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Done, purged {purged} items.'))
@@ -1,7 +1,54 @@
 from django.db import models
+from django.db.models import Case, Exists, OuterRef, Value, When
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.query import ModelIterable
+from django.utils import timezone
 
+from .signals import bulk_changed
+from .utils import DEFAULT_BATCH_SIZE, chunked
 
-class RemovedItemsManager(models.Manager):
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """Queryset with bulk soft delete for models with 'is_removed' field (e.g. SoftDeletableModel).
+
+    Both soft_delete() and restore() are single UPDATE queries, Model.save() is not called.
+    Fields with auto_now (e.g. modified timestamps) are refreshed too, so they hold time of removal.
+    """
+
+    def _update_removed(self, is_removed: bool) -> int:
+        now = timezone.now()
+        values = {
+            field.name: now for field in self.model._meta.concrete_fields if getattr(field, 'auto_now', False)
+        }
+        count = self.exclude(is_removed=is_removed).update(is_removed=is_removed, **values)
+        if count:
+            bulk_changed.send(sender=self.model, using=self.db)
+        return count
+
+    def soft_delete(self) -> int:
+        """Mark all items in queryset as removed, return number of changed items."""
+        return self._update_removed(True)
+
+    def restore(self) -> int:
+        """Mark all items in queryset as not removed, return number of changed items."""
+        return self._update_removed(False)
+
+
+class LiveItemsManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """Manager returning only live (not removed) items.
+
+    Queries of this manager can use partial indexes from dcore.model_indexes.
+    Best use with django-model-utils.
+    """
+
+    def get_queryset(self):
+        """
+        Return queryset limited to live entries.
+        """
+        return super().get_queryset().filter(is_removed=False)
+
+
+class RemovedItemsManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     """Manager returning only removed items.
 
     Best use with django-model-utils.
@@ -21,15 +68,156 @@ class RemovedItemsManager(models.Manager):
 # Define InheritanceManager only if there is django_utils package:
 try:
     from model_utils.managers import InheritanceManager as ModelUtilsInheritanceManager
+    from model_utils.managers import InheritanceQuerySet as ModelUtilsInheritanceQuerySet
 except ImportError:
     pass  # Nothing to do, do not define InheritanceManager
 else:
+    SUBCLASS_LOADING_JOIN = 'join'
+    SUBCLASS_LOADING_TWO_PHASE = 'two_phase'
+
+    class TwoPhaseInheritanceIterable(ModelIterable):
+        """Iterable loading subclasses in two phases instead of one query with LEFT JOIN per subclass table.
+
+        1. Base rows are loaded with discriminator (path of the most concrete subclass, computed by EXISTS subqueries).
+        2. Every subclass present in the rows is loaded by one pk__in query (per chunk of rows).
+
+        Objects are yielded in order of base rows.
+        """
+
+        def __iter__(self):
+            queryset = self.queryset
+            # The deepest subclasses first, so with 'a' and 'a__b' the most concrete one is used.
+            subclasses = sorted(queryset.subclasses, key=len, reverse=True)
+            subclass_models = {path: queryset._get_subclass_model(path) for path in subclasses}
+
+            phase_one = queryset._chain()
+            if subclasses:
+                phase_one.query.add_annotation(Case(
+                    *[
+                        When(Exists(model._base_manager.filter(pk=OuterRef('pk'))), then=Value(path))
+                        for path, model in subclass_models.items()
+                    ],
+                    default=Value(None),
+                    output_field=models.CharField(),
+                ), '_subclass_path', select=True)
+            copied_attributes = list(getattr(queryset, '_annotated', [])) + list(queryset.query.extra)
+            # Base object without subclass row has no rows in selected subclass tables (as with joins).
+            selected_accessors = {path.split(LOOKUP_SEP)[0] for path in subclasses}
+            subclass_relations = [
+                relation for relation in queryset.model._meta.related_objects
+                if relation.one_to_one and relation.parent_link and relation.get_accessor_name() in selected_accessors
+            ]
+
+            base_objects = ModelIterable(phase_one, chunked_fetch=self.chunked_fetch, chunk_size=self.chunk_size)
+            for chunk in chunked(base_objects, DEFAULT_BATCH_SIZE):
+                pks_by_path = {}
+                for obj in chunk:
+                    path = obj.__dict__.pop('_subclass_path', None)  # discriminator is not attribute of result
+                    if path:
+                        pks_by_path.setdefault(path, []).append(obj.pk)
+
+                sub_objects = {}
+                for path, pks in pks_by_path.items():
+                    sub_queryset = subclass_models[path]._base_manager.using(queryset.db).filter(pk__in=pks)
+                    sub_objects.update((sub_obj.pk, sub_obj) for sub_obj in sub_queryset)
+
+                for obj in chunk:
+                    sub_obj = sub_objects.get(obj.pk)
+                    if sub_obj is None:
+                        for relation in subclass_relations:
+                            relation.set_cached_value(obj, None)
+                        yield obj  # Instance of base class (or subclass row deleted in meantime)
+                        continue
+                    for name in copied_attributes:
+                        setattr(sub_obj, name, getattr(obj, name))
+                    # Keep related objects loaded by select_related of base queryset.
+                    sub_obj._state.fields_cache = {**obj._state.fields_cache, **sub_obj._state.fields_cache}
+                    yield sub_obj
+
+    class InheritanceQuerySet(ModelUtilsInheritanceQuerySet):
+        """Inheritance queryset with selectable strategy of subclasses loading.
+
+        Strategies:
+            - 'join': one query with LEFT JOIN per subclass table (default, django-model-utils behaviour),
+            - 'two_phase': base rows with discriminator first, then one query per subclass present in rows.
+              Better for wide hierarchies, where the joined query is too wide and slow. Discriminator is computed
+              by one EXISTS subquery per subclass for every base row (primary key lookups), so for narrow
+              hierarchies or queries with few rows 'join' is usually faster.
+
+        Examples:
+            Animal.objects.all().subclass_loading('two_phase')
+        """
+
+        _subclass_loading = SUBCLASS_LOADING_JOIN
+
+        def subclass_loading(self, strategy: str):
+            """Return queryset loading subclasses by strategy ('join' or 'two_phase').
+
+            'two_phase' evaluates one EXISTS subquery per selected subclass for every base row, select only
+            needed subclasses (select_subclasses) to keep the discriminator cheap.
+            """
+            assert strategy in [SUBCLASS_LOADING_JOIN, SUBCLASS_LOADING_TWO_PHASE], \
+                f'Unknown subclass loading strategy "{strategy}".'
+            clone = self._chain()
+            if hasattr(self, 'subclasses') and strategy != self._subclass_loading:
+                if strategy == SUBCLASS_LOADING_TWO_PHASE and isinstance(clone.query.select_related, dict):
+                    # Remove joins of subclasses added by select_subclasses()
+                    for path in clone.subclasses:
+                        clone.query.select_related.pop(path.split(LOOKUP_SEP)[0], None)
+                clone._subclass_loading = strategy
+                return clone.select_subclasses(*clone.subclasses)
+            clone._subclass_loading = strategy
+            return clone
+
+        def select_subclasses(self, *subclasses):
+            if self._subclass_loading == SUBCLASS_LOADING_JOIN:
+                return super().select_subclasses(*subclasses)
+
+            # Validate and resolve subclasses by django-model-utils, but without joins.
+            select_related = self.query.select_related
+            queryset = super().select_subclasses(*subclasses)
+            queryset.query.select_related = select_related
+            queryset._iterable_class = TwoPhaseInheritanceIterable
+            return queryset
+
+        def _get_subclass_model(self, path: str):
+            """Return model class of subclass path (e.g. 'cat__kitten')."""
+            model = self.model
+            for accessor in path.split(LOOKUP_SEP):
+                model = next(
+                    relation.related_model for relation in model._meta.related_objects
+                    if relation.one_to_one and relation.parent_link and relation.get_accessor_name() == accessor
+                )
+            return model
+
+        def _chain(self, **kwargs):
+            chained = super()._chain(**kwargs)
+            chained._subclass_loading = self._subclass_loading
+            return chained
+
+        def _clone(self):
+            clone = super()._clone()
+            clone._subclass_loading = self._subclass_loading
+            return clone
+
     class InheritanceManager(ModelUtilsInheritanceManager):
         """Inheritance manager usable with django-rest-framework (djangorestframework)
 
         This manager can be used to define inheritance serializers in django-rest-framework.
         See module serializers.
+
+        Strategy of subclasses loading can be set by 'subclass_loading_strategy' attribute
+        (see InheritanceQuerySet), or per queryset by QuerySet.subclass_loading().
         """
 
+        _queryset_class = InheritanceQuerySet
+        subclass_loading_strategy = SUBCLASS_LOADING_JOIN
+
+        def get_queryset(self):
+            return super().get_queryset().subclass_loading(self.subclass_loading_strategy)
+
         def all(self, *args, **kwargs):
             return super().all(*args, **kwargs).select_subclasses()
+
+        def subclass_loading(self, strategy: str):
+            return self.get_queryset().subclass_loading(strategy)
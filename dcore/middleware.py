@@ -2,7 +2,14 @@ from django.shortcuts import reverse, redirect
 from django.conf import settings
 from django.core.handlers.wsgi import WSGIRequest
 from django.urls import reverse
-from re import compile
+from functools import lru_cache
+from re import compile, error as RegexError
+from typing import Callable, Iterable
+
+
+REGEX_SPECIAL_CHARS = set('.^$*+?{}[]\\|()')
+# Group references (\1, (?P=name), (?(1)...)) depend on numbering of groups, which is changed by joining.
+REGEX_GROUP_REFERENCE = compile(r'\\[1-9]|\(\?P=|\(\?\(')
 
 
 def force_default_language_middleware(get_response):
@@ -26,6 +33,50 @@ def force_default_language_middleware(get_response):
     return middleware
 
 
+def compile_url_matcher(patterns: Iterable[str]) -> Callable[[str], bool]:
+    """Compile URL regexes into one matcher, it returns True if any pattern matches start of path (as re.match).
+
+    Literal patterns (without special chars, optionally starting with '^') are matched as prefixes
+    by trie walk, other patterns are joined into one alternation regex. Patterns which cannot be joined
+    (with group references, e.g. backreference \\1, or with global flags or duplicate group names)
+    are matched one by one.
+    """
+    trie = {}
+    regexes = []
+    compiled_regexes = []
+    for pattern in patterns:
+        literal = pattern[1:] if pattern.startswith('^') else pattern
+        if REGEX_SPECIAL_CHARS.isdisjoint(literal):
+            node = trie
+            for char in literal:
+                node = node.setdefault(char, {})
+            node[None] = True  # end of prefix
+        elif REGEX_GROUP_REFERENCE.search(pattern):
+            compiled_regexes.append(compile(pattern))
+        else:
+            regexes.append(pattern)
+
+    if regexes:
+        try:
+            compiled_regexes.append(compile('|'.join(f'(?:{regex})' for regex in regexes)))
+        except RegexError:
+            compiled_regexes.extend(compile(regex) for regex in regexes)
+
+    def match(path: str) -> bool:
+        node = trie
+        if None in node:
+            return True
+        for char in path:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                return True
+        return any(regex.match(path) for regex in compiled_regexes)
+
+    return match
+
+
 def force_login_middleware(get_response):
     """
     Middleware that requires a user to be authenticated to view any page other
@@ -36,12 +87,18 @@ def force_login_middleware(get_response):
     Requires authentication middleware and template context processors to be
     loaded. You'll get an error if they aren't.
 
+    Exempt URLs are compiled once into one matcher (see compile_url_matcher).
+
     Source: http://onecreativeblog.com/post/59051248/django-login-required-middleware
     """
 
-    exempt_urls = [compile(reverse(settings.LOGIN_URL))]
+    exempt_urls = [reverse(settings.LOGIN_URL)]
     if hasattr(settings, 'LOGIN_EXEMPT_URLS'):
-        exempt_urls += [compile(regex_url) for regex_url in settings.LOGIN_EXEMPT_URLS]
+        exempt_urls += list(settings.LOGIN_EXEMPT_URLS)
+    # Decisions for paths are cached, size can be changed by LOGIN_EXEMPT_URLS_CACHE_SIZE setting.
+    is_exempt_url = lru_cache(maxsize=getattr(settings, 'LOGIN_EXEMPT_URLS_CACHE_SIZE', 1024))(
+        compile_url_matcher(exempt_urls)
+    )
 
     def middleware(request: WSGIRequest):
         assert hasattr(request, 'user'), "The Login Required middleware\
@@ -53,7 +110,7 @@ def force_login_middleware(get_response):
 
         if not request.user.is_authenticated:
             path = request.path_info
-            if not any(m.match(path) for m in exempt_urls):
+            if not is_exempt_url(path):
                 return redirect(settings.LOGIN_URL)
         return get_response(request)
 
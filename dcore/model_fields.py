@@ -1,17 +1,127 @@
+import warnings
+
 from django.db import models
+from django.db.models.constants import LOOKUP_SEP
 from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+from django.db.models.query import QuerySet
+
+
+def _get_subclass_relations(model) -> list:
+    """Return reverse parent links of direct multi-table subclasses of model."""
+    return [relation for relation in model._meta.related_objects if relation.one_to_one and relation.parent_link]
+
+
+def _get_subclass_paths(model) -> list:
+    """Return lookup paths of all multi-table subclasses of model (e.g. ['dog', 'cat', 'cat__kitten'])."""
+    paths = []
+    for relation in _get_subclass_relations(model):
+        accessor = relation.get_accessor_name()
+        paths.append(accessor)
+        paths += [accessor + LOOKUP_SEP + path for path in _get_subclass_paths(relation.related_model)]
+    return paths
+
+
+def _get_loaded_subclass_instance(obj):
+    """Return the most concrete subclass instance of obj already loaded by select_related, else obj."""
+    for relation in _get_subclass_relations(type(obj)):
+        if relation.is_cached(obj):
+            sub_obj = relation.get_cached_value(obj)
+            if sub_obj is not None:
+                return _get_loaded_subclass_instance(sub_obj)
+    return obj
+
+
+def _is_subclass_known(obj) -> bool:
+    """Return False if obj can be instance of unknown subclass (loaded without subclass tables)."""
+    relations = _get_subclass_relations(type(obj))
+    return not relations or any(relation.is_cached(obj) for relation in relations)
+
+
+def _mark_most_concrete(obj):
+    """Mark obj as instance of the most concrete class, i.e. cache that it has no subclass rows."""
+    for relation in _get_subclass_relations(type(obj)):
+        if not relation.is_cached(obj):
+            relation.set_cached_value(obj, None)
+
+
+def select_related_subclasses(queryset: QuerySet, *field_names) -> QuerySet:
+    """Return queryset with select_related of InheritanceForeignKey fields resolved to concrete subclasses.
+
+    Subclass tables are joined in the same query (LEFT JOIN per subclass table),
+    field names can be paths (e.g. 'owner__pet'). Use it instead of plain QuerySet.select_related,
+    which joins only table of base class (see InheritanceForeignKey).
+
+    Examples:
+        select_related_subclasses(Owner.objects.all(), 'pet')
+    """
+    lookups = []
+    for field_name in field_names:
+        model = queryset.model
+        for name in field_name.split(LOOKUP_SEP):
+            model = model._meta.get_field(name).related_model
+        lookups.append(field_name)
+        lookups += [field_name + LOOKUP_SEP + path for path in _get_subclass_paths(model)]
+    return queryset.select_related(*lookups)
 
 
 # source: https://github.com/jazzband/django-model-utils/issues/11
 class InheritanceForwardManyToOneDescriptor(ForwardManyToOneDescriptor):
+    def __get__(self, instance, cls=None):
+        value = super().__get__(instance, cls)
+        if value is not None and type(value) is self.field.remote_field.model:
+            # Object loaded by select_related is instance of base class, subclass is in its relation cache.
+            sub_value = _get_loaded_subclass_instance(value)
+            if sub_value is value and not _is_subclass_known(value):
+                warnings.warn(
+                    f'{self.field.model.__name__}.{self.field.name} was loaded by select_related() without subclass '
+                    f'tables, subclass instance is loaded by extra query. Use select_related_subclasses() '
+                    f'or prefetch_related() instead.',
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+                sub_value = self.get_object(instance)
+            if sub_value is not value:
+                self.field.set_cached_value(instance, sub_value)
+                value = sub_value
+        return value
+
+    def get_object(self, instance):
+        obj = super().get_object(instance)
+        _mark_most_concrete(obj)  # loaded by select_subclasses()
+        return obj
+
     def get_queryset(self, **hints):
         return self.field.remote_field.model.objects.db_manager(hints=hints).select_subclasses()
 
+    def get_subclasses_prefetch_queryset(self) -> QuerySet:
+        """Return queryset for prefetch_related, subclasses are loaded by one query per subclass if possible."""
+        queryset = self.get_queryset()
+        if hasattr(queryset, 'subclass_loading'):
+            queryset = queryset.subclass_loading('two_phase')  # dcore.managers.InheritanceManager
+        return queryset
+
+    def get_prefetch_queryset(self, instances, queryset=None):
+        # Django < 5.0
+        if queryset is None:
+            queryset = self.get_subclasses_prefetch_queryset()
+        return super().get_prefetch_queryset(instances, queryset)
+
+    def get_prefetch_querysets(self, instances, querysets=None):
+        if querysets is None:
+            querysets = [self.get_subclasses_prefetch_queryset()]
+        return super().get_prefetch_querysets(instances, querysets)
+
 
 # source: https://github.com/jazzband/django-model-utils/issues/11
 class InheritanceForeignKey(models.ForeignKey):
     """Foreign key, that return concrete subclass.
 
     Usable only with django-model-utils package !!
+
+    Related objects can be loaded by prefetch_related (one query per subclass with dcore InheritanceManager)
+    or by select_related_subclasses function (subclass tables joined in the same query).
+
+    Plain QuerySet.select_related joins only table of base class, subclass of such object is then
+    loaded by one extra query per object on first access (RuntimeWarning is emitted).
     """
     forward_related_accessor_class = InheritanceForwardManyToOneDescriptor
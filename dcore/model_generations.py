@@ -0,0 +1,148 @@
+"""Generation counters of models, used to invalidate cached data without scanning cache keys.
+
+Generation of tracked model is bumped on every change of its objects (save, delete, m2m change
+and bulk_changed signal of dcore bulk helpers). Cache key containing current generation
+becomes unreachable after change, so stale data are never served. All changes of one transaction
+bump every model once, after commit.
+
+QuerySet.update() and other raw writes send no signal, call bump_model_generation() after them.
+
+Settings:
+- DCORE_MODEL_GENERATIONS = True enables tracking, default False.
+- DCORE_MODEL_GENERATIONS_MODELS = Labels of tracked models (e.g. ['shop.Product']), signal receivers
+  are connected only for them (and their subclasses) when app is ready. Other models can be tracked
+  by track_models() in ready() of their app. Every process writing the models has to track them.
+- DCORE_MODEL_GENERATIONS_CACHE = Alias of cache with generations, default 'default'.
+"""
+import time
+import weakref
+from typing import Iterable, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .signals import bulk_changed
+
+
+def _get_cache():
+    return caches[getattr(settings, 'DCORE_MODEL_GENERATIONS_CACHE', 'default')]
+
+
+def _generation_key(model) -> str:
+    return f'dcore_generation:{model._meta.concrete_model._meta.label_lower}'
+
+
+def is_tracking_enabled() -> bool:
+    return getattr(settings, 'DCORE_MODEL_GENERATIONS', False)
+
+
+def _initial_generation() -> int:
+    """Return first generation of model, it is based on time, so generation evicted from cache is not reused."""
+    return time.time_ns() // 1000
+
+
+def get_model_generations(models: Iterable) -> Tuple[int, ...]:
+    """Return current generations of models (by one cache query)."""
+    keys = [_generation_key(model) for model in models]
+    cache = _get_cache()
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _initial_generation(), timeout=None)
+            generations[key] = cache.get(key)
+    return tuple(generations[key] for key in keys)
+
+
+def bump_model_generation(model):
+    """Bump generation of model and its parents (multi-table inheritance shares their tables)."""
+    cache = _get_cache()
+    for changed_model in [model, *model._meta.get_parent_list()]:
+        key = _generation_key(changed_model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), timeout=None)  # Missing generation
+
+
+class _PendingBumps:
+    """Models changed in current transaction of connection, they are bumped once after commit.
+
+    Instance is registered by one transaction.on_commit() and connection keeps only weak reference to it.
+    Rollback (of transaction or of savepoint, where it was registered) discards the callback and so the
+    instance, the next change registers a new one.
+    """
+
+    def __init__(self):
+        self.models = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        for model in self.models:
+            bump_model_generation(model)
+
+
+def _bump_on_commit(models, using):
+    """Bump generations after commit, so data cached during transaction are not stored with new generation."""
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if not connection.in_atomic_block:
+        for model in models:
+            bump_model_generation(model)
+        return
+    pending_ref = getattr(connection, 'dcore_pending_generations', None)
+    pending = pending_ref() if pending_ref is not None else None
+    if pending is None or pending.done:
+        pending = _PendingBumps()
+        connection.dcore_pending_generations = weakref.ref(pending)
+        transaction.on_commit(pending, using=using)
+    pending.models.update(models)
+
+
+def _model_changed(sender, using=None, **kwargs):
+    _bump_on_commit([sender], using)
+
+
+def _m2m_changed(sender, instance, action, model, using=None, **kwargs):
+    if action.startswith('post_'):
+        _bump_on_commit([sender, type(instance), model], using)  # sender is through model
+
+
+_tracked_models = set()
+
+
+def track_models(*models):
+    """Connect receivers bumping generations on changes of models (and of their subclasses).
+
+    Receivers are connected only for given senders, so other models keep fast delete and pay nothing.
+    """
+    for model in models:
+        model = model._meta.concrete_model
+        senders = [model, *(
+            subclass for subclass in apps.get_models() if model in subclass._meta.get_parent_list()
+        )]
+        for sender in senders:
+            label = sender._meta.label_lower
+            post_save.connect(_model_changed, sender=sender, dispatch_uid=f'dcore_generation_post_save_{label}')
+            post_delete.connect(_model_changed, sender=sender, dispatch_uid=f'dcore_generation_post_delete_{label}')
+            bulk_changed.connect(_model_changed, sender=sender, dispatch_uid=f'dcore_generation_bulk_changed_{label}')
+        through_models = [field.remote_field.through for field in model._meta.many_to_many] + [
+            relation.through for relation in model._meta.related_objects if relation.many_to_many
+        ]
+        for through in through_models:
+            m2m_changed.connect(
+                _m2m_changed, sender=through, dispatch_uid=f'dcore_generation_m2m_changed_{through._meta.label_lower}'
+            )
+        _tracked_models.add(model)
+
+
+def are_models_tracked(models: Iterable) -> bool:
+    """Return True if tracking is enabled and changes of all models bump their generations."""
+    return is_tracking_enabled() and all(model._meta.concrete_model in _tracked_models for model in models)
+
+
+def connect_signals():
+    """Track models from DCORE_MODEL_GENERATIONS_MODELS setting."""
+    track_models(*(apps.get_model(label) for label in getattr(settings, 'DCORE_MODEL_GENERATIONS_MODELS', [])))
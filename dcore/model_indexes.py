@@ -0,0 +1,24 @@
+from django.db import models
+from django.db.models import Q
+
+
+LIVE_ITEMS_CONDITION = Q(is_removed=False)
+
+
+def live_index(*fields: str, name: str, **kwargs) -> models.Index:
+    """Return partial index (WHERE is_removed = false) for queries of live items (see LiveItemsManager).
+
+    Removed items are not in the index, so its size does not grow with archive of removed items.
+    Database has to support partial indexes (PostgreSQL, SQLite), other databases ignore the index.
+
+    Examples:
+        class Article(SoftDeletableModel):
+            class Meta:
+                indexes = [live_index('author', '-created', name='article_live_author_idx')]
+    """
+    return models.Index(fields=list(fields), name=name, condition=LIVE_ITEMS_CONDITION, **kwargs)
+
+
+def live_unique_constraint(*fields: str, name: str, **kwargs) -> models.UniqueConstraint:
+    """Return unique constraint applied only to live items, removed items can repeat values."""
+    return models.UniqueConstraint(fields=list(fields), name=name, condition=LIVE_ITEMS_CONDITION, **kwargs)
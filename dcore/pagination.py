@@ -0,0 +1,264 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+import uuid
+from typing import List, Optional, Sequence, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.query import QuerySet
+
+from .exceptions import ImproperlyConfigured, InvalidData
+
+
+def get_keyset_ordering(queryset: QuerySet, ordering: Optional[Sequence[str]] = None) -> Tuple[str, ...]:
+    """Return stable ordering for keyset pagination, PK is added as the last field if it is missing.
+
+    Args:
+        queryset: Paginated queryset, its ordering (or ordering of model) is used if ordering is None.
+        ordering: Field names, e.g. ('-created', 'id').
+    """
+    if ordering is None:
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+    ordering = tuple(ordering)
+    if not all(isinstance(name, str) and name.lstrip('-') and name != '?' for name in ordering):
+        raise ImproperlyConfigured('Keyset pagination supports only field names in ordering.')
+    pk_names = {'pk', queryset.model._meta.pk.name}
+    if not any(name.lstrip('-') in pk_names for name in ordering):
+        ordering += ('pk',)
+    return ordering
+
+
+def _get_field(model, path: str):
+    """Return model field for lookup path, e.g. 'author__name'."""
+    field = None
+    for name in path.split(LOOKUP_SEP):
+        if field is not None:
+            model = field.related_model
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+    return field
+
+
+def _get_value(obj, path: str):
+    """Return value of lookup path from object (related objects are traversed by attributes)."""
+    names = path.split(LOOKUP_SEP)
+    for name in names[:-1]:
+        obj = getattr(obj, name)
+        if obj is None:
+            return None
+    name = names[-1]
+    if name != 'pk':
+        name = obj._meta.get_field(name).attname
+    return getattr(obj, name)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()  # full precision, DjangoJSONEncoder truncates microseconds
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    """Return opaque cursor token with values of keys of the last row."""
+    data = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str, model, ordering: Sequence[str]) -> List:
+    """Return values of keys from cursor token, converted to python types of ordering fields.
+
+    Raises:
+        InvalidData: If cursor is invalid.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, binascii.Error) as e:
+        raise InvalidData('Invalid cursor.') from e
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidData('Invalid cursor.')
+    try:
+        return [
+            None if value is None else _get_field(model, name.lstrip('-')).to_python(value)
+            for name, value in zip(ordering, values)
+        ]
+    except (ValidationError, FieldDoesNotExist) as e:
+        raise InvalidData('Invalid cursor.') from e
+
+
+def keyset_filter(ordering: Sequence[str], values: Sequence) -> Q:
+    """Return condition selecting rows after row with values in ordering.
+
+    E.g. for ordering ('-created', 'id'): created < v1 OR (created = v1 AND id > v2).
+    Ordering fields should not contain NULL values.
+    """
+    condition = Q()
+    for index, name in enumerate(ordering):
+        field_name = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        equal = {ordering[i].lstrip('-'): values[i] for i in range(index)}
+        condition |= Q(**equal, **{f'{field_name}__{lookup}': values[index]})
+    return condition
+
+
+def paginate_keyset(
+    queryset: QuerySet,
+    page_size: int,
+    cursor: Optional[str] = None,
+    ordering: Optional[Sequence[str]] = None,
+) -> Tuple[list, Optional[str]]:
+    """Return page of objects after cursor and cursor of next page (None for the last page).
+
+    Page is selected by condition on ordering keys (no OFFSET, no COUNT), so cost of any page
+    is the same as cost of the first page (with index on ordering fields).
+
+    Raises:
+        InvalidData: If cursor is invalid.
+    """
+    queryset, ordering = _get_keyset_queryset(queryset, cursor, ordering)
+    return _get_keyset_page(list(queryset[:page_size + 1]), page_size, ordering)
+
+
+async def apaginate_keyset(
+    queryset: QuerySet,
+    page_size: int,
+    cursor: Optional[str] = None,
+    ordering: Optional[Sequence[str]] = None,
+) -> Tuple[list, Optional[str]]:
+    """Async variant of paginate_keyset, page is loaded by async ORM.
+
+    Raises:
+        InvalidData: If cursor is invalid.
+    """
+    queryset, ordering = _get_keyset_queryset(queryset, cursor, ordering)
+    return _get_keyset_page([obj async for obj in queryset[:page_size + 1]], page_size, ordering)
+
+
+def _get_keyset_queryset(queryset: QuerySet, cursor: Optional[str], ordering: Optional[Sequence[str]]):
+    """Return (queryset ordered and filtered after cursor, ordering)."""
+    ordering = get_keyset_ordering(queryset, ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, queryset.model, ordering)))
+    return queryset, ordering
+
+
+def _get_keyset_page(objects: list, page_size: int, ordering: Sequence[str]) -> Tuple[list, Optional[str]]:
+    """Return page from loaded page_size + 1 objects and cursor of next page."""
+    if len(objects) <= page_size:
+        return objects, None
+    objects = objects[:page_size]
+    return objects, encode_cursor([_get_value(objects[-1], name.lstrip('-')) for name in ordering])
+
+
+def exact_count(queryset: QuerySet, cap: int = None) -> Tuple[int, bool]:
+    """Return exact count of queryset (COUNT(*)), as (count, is exact)."""
+    return queryset.count(), True
+
+
+def capped_count(queryset: QuerySet, cap: int) -> Tuple[int, bool]:
+    """Return count of queryset limited to cap, as (count, is exact).
+
+    Counts only rows of LIMIT subquery (SELECT COUNT(*) FROM (... LIMIT cap + 1)),
+    so it stops reading after cap rows. Count bigger than cap is returned as cap, not exact ("cap+").
+    """
+    count = queryset.order_by()[:cap + 1].count()
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+def estimated_count(queryset: QuerySet, cap: int) -> Tuple[int, bool]:
+    """Return count of queryset estimated by query planner, as (count, is exact).
+
+    Estimate is used only on PostgreSQL (EXPLAIN) and only if it is bigger than cap, small counts
+    (and counts on other databases, e.g. SQLite) are computed by capped_count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate > cap:
+            return estimate, False
+    return capped_count(queryset, cap)
+
+
+class KnownCountQuerySetMixin:
+    """QuerySet returning already known count from count(), e.g. count of search count strategy.
+
+    Paginators take count from queryset.count(). Known count is not passed to clones (filter(), slicing, ...),
+    they count by COUNT(*) again.
+    """
+
+    known_count = None
+
+    def count(self) -> int:
+        if self.known_count is not None:
+            return self.known_count
+        return super().count()
+
+
+_known_count_classes = {}
+
+
+def with_known_count(queryset: QuerySet, count: int) -> QuerySet:
+    """Return copy of queryset returning count from count() without query.
+
+    Copy is instance of subclass of queryset class with KnownCountQuerySetMixin, so it keeps
+    behavior of custom querysets (e.g. InheritanceQuerySet).
+    """
+    queryset_class = type(queryset)
+    known_count_class = _known_count_classes.get(queryset_class)
+    if known_count_class is None:
+        known_count_class = _known_count_classes[queryset_class] = type(
+            f'KnownCount{queryset_class.__name__}', (KnownCountQuerySetMixin, queryset_class), {}
+        )
+    queryset = queryset.all()
+    queryset.__class__ = known_count_class
+    queryset.known_count = count
+    return queryset
+
+
+COUNT_STRATEGIES = {
+    'exact': exact_count,
+    'capped': capped_count,
+    'estimated': estimated_count,
+}
+
+
+async def aexact_count(queryset: QuerySet, cap: int = None) -> Tuple[int, bool]:
+    """Async variant of exact_count."""
+    return await queryset.acount(), True
+
+
+async def acapped_count(queryset: QuerySet, cap: int) -> Tuple[int, bool]:
+    """Async variant of capped_count."""
+    count = await queryset.order_by()[:cap + 1].acount()
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+async def aestimated_count(queryset: QuerySet, cap: int) -> Tuple[int, bool]:
+    """Async variant of estimated_count, EXPLAIN (raw cursor) runs in sync thread."""
+    if connections[queryset.db].vendor == 'postgresql':
+        return await sync_to_async(estimated_count)(queryset, cap)
+    return await acapped_count(queryset, cap)
+
+
+ASYNC_COUNT_STRATEGIES = {
+    'exact': aexact_count,
+    'capped': acapped_count,
+    'estimated': aestimated_count,
+}
@@ -1,15 +1,48 @@
-from typing import Set
-from collections import abc
+import threading
+from typing import Callable, Dict, FrozenSet, Optional, Set, Tuple
+from collections import OrderedDict, abc, namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import ForeignObjectRel, Prefetch
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.query import QuerySet
 
 
 # Define InheritanceModelSerializer only if there is rest_framework (djangorestframework) package:
 try:
     from rest_framework import serializers
+    from rest_framework.fields import empty
     from rest_framework.request import Request
     from rest_framework.settings import api_settings
 except ImportError:
     pass  # Nothing to do, do not define InheritanceModelSerializer
 else:
+    class InheritanceListSerializer(serializers.ListSerializer):
+        """List serializer for InheritanceModelSerializer, used automatically with many=True.
+
+        Instances are grouped by subtype and every group is serialized by one sub-serializer
+        (instead of new sub-serializer per instance), order of instances is kept.
+        """
+
+        def to_representation(self, data):
+            iterable = data.all() if isinstance(data, models.Manager) else data
+
+            groups = {}
+            for index, instance in enumerate(iterable):
+                serializer_class = self.child.get_subtype_serializer_class(type(instance))
+                indexes, instances = groups.setdefault(serializer_class, ([], []))
+                indexes.append(index)
+                instances.append(instance)
+
+            representation = [None] * sum(len(indexes) for indexes, __ in groups.values())
+            for serializer_class, (indexes, instances) in groups.items():
+                serializer = serializer_class(many=True, context=self.context)
+                for index, item in zip(indexes, serializer.to_representation(instances)):
+                    representation[index] = item
+            return representation
+
+
     class InheritanceModelSerializer(serializers.ModelSerializer):
         """Inheritance model serializer usable with django-rest-framework (djangorestframework)
 
@@ -60,20 +93,54 @@ else:
 
             return serializer_class(data=data)
 
-        def to_representation(self, instance):
-            if not hasattr(self.Meta, 'subtypes'):
+        @classmethod
+        def many_init(cls, *args, **kwargs):
+            if hasattr(getattr(cls, 'Meta', None), 'list_serializer_class'):
+                return super().many_init(*args, **kwargs)
+
+            # The same as BaseSerializer.many_init, only default list serializer groups instances by subtype.
+            list_kwargs = {}
+            for key in getattr(serializers, 'LIST_SERIALIZER_KWARGS_REMOVE', ()):  # DRF 3.14+
+                value = kwargs.pop(key, None)
+                if value is not None:
+                    list_kwargs[key] = value
+            list_kwargs['child'] = cls(*args, **kwargs)
+            list_kwargs.update({
+                key: value for key, value in kwargs.items() if key in serializers.LIST_SERIALIZER_KWARGS
+            })
+            return InheritanceListSerializer(*args, **list_kwargs)
+
+        @classmethod
+        def get_subtype_serializer_class(cls, model_class):
+            """Return serializer class for model class from Meta.subtypes, the nearest class in MRO is used.
+
+            Resolved classes are cached per serializer class, so subclasses of subtypes
+            (e.g. Kitten for Cat subtype) are resolved only once.
+            """
+            if not hasattr(cls.Meta, 'subtypes'):
                 raise ValueError('You have to define "subtypes" attribute in Meta class.')
 
-            serializer = self.Meta.subtypes.get(type(instance))
-            if serializer:
-                return serializer(instance, context=self.context).data
+            cache = cls.__dict__.get('_subtype_serializer_cache')
+            if cache is None:
+                cache = cls._subtype_serializer_cache = {}
+            if model_class not in cache:
+                cache[model_class] = next(
+                    (cls.Meta.subtypes[base] for base in model_class.__mro__ if base in cls.Meta.subtypes), None
+                )
 
-            raise ValueError(
-                'Unknown "{}" subclass of "{}" class, check your definition of Meta.subtypes '
-                'in serializer for class "{}".'.format(
-                    type(instance).__name__, self.Meta.model.__name__, self.Meta.model.__name__
+            serializer_class = cache[model_class]
+            if serializer_class is None:
+                raise ValueError(
+                    'Unknown "{}" subclass of "{}" class, check your definition of Meta.subtypes '
+                    'in serializer for class "{}".'.format(
+                        model_class.__name__, cls.Meta.model.__name__, cls.Meta.model.__name__
+                    )
                 )
-            )
+            return serializer_class
+
+        def to_representation(self, instance):
+            serializer = self.get_subtype_serializer_class(type(instance))
+            return serializer(instance, context=self.context).data
 
         def to_internal_value(self, data):
             if not isinstance(data, abc.Mapping):
@@ -87,6 +154,13 @@ else:
             return self.get_subclass(data).to_internal_value(data)
 
 
+    _field_plan_cache_lock = threading.Lock()
+
+    # field_names: names of fields to serialize or None for all fields
+    # nested: {field name: (include names, exclude names, extra names)} for nested serializers
+    FieldPlan = namedtuple('FieldPlan', ['field_names', 'nested'])
+
+
     class DynamicFieldsSerializerMixin:
         """Mixin for django rest framework (djangorestframework) serializers to allow define fields in request URL.
 
@@ -111,13 +185,32 @@ else:
 
         All fields are separated by comma (e.g. fields=field1,field2,...).
         You can edit field separator by 'dynamic_fields_separator'.
+
+        Fields of nested serializers (also with this mixin) can be selected by dot notation,
+        e.g. fields=id,author.name,tags.slug or exclude_fields=author.email
+        (editable by 'dynamic_fields_nested_separator'). Nested serializer without nested selection
+        returns its default fields.
+
+        Resolved set of fields (field plan) is cached per serializer class and requested field names
+        in LRU cache with max size 'dynamic_fields_cache_size' (0 disables cache). Field names are parsed
+        by get_dynamic_field_names, get_exclude_field_names and get_extra_field_names, if build of plan
+        depends on anything else (e.g. user), override also get_field_plan_key (or disable cache).
         """
 
         dynamic_fields_extra_key = 'extra_fields'
         dynamic_fields_include_key = 'fields'
         dynamic_fields_exclude_key = 'exclude_fields'
         dynamic_fields_separator = ','
+        dynamic_fields_nested_separator = '.'
         dynamic_fields_all_group_name = '__all__'
+        dynamic_fields_cache_size = 256
+
+        def get_field_groups(self) -> dict:
+            """Return field groups from Meta class with automatically added group of all fields."""
+            all_fields = self.Meta.fields
+            if all_fields == serializers.ALL_FIELDS:
+                all_fields = self.fields.keys()
+            return {**getattr(self.Meta, 'field_groups', {}), self.dynamic_fields_all_group_name: all_fields}
 
         def get_dynamic_field_names(self, request) -> Set:
             """Return set of wanted fields defined by query param 'fields' or view field 'default_fields'."""
@@ -125,8 +218,7 @@ else:
             if request:
                 includes_value = request.query_params.get(self.dynamic_fields_include_key, None)
 
-            field_groups = getattr(self.Meta, 'field_groups', {})
-            field_groups[self.dynamic_fields_all_group_name] = self.Meta.fields
+            field_groups = self.get_field_groups()
 
             if includes_value in field_groups:
                 include_field_names = set(field_groups[includes_value])
@@ -177,30 +269,309 @@ else:
             self.show_origin_fields = True
             return data
 
+        @property
+        def selected_field_names(self) -> Set:
+            """Return set of field names selected by request (fields returned in response)."""
+            return {name for name, field in self.new_fields.items() if not field.write_only}
+
+        def get_queryset_plan(self, queryset: QuerySet) -> Tuple[Optional[Set], Set, Dict[str, Optional[QuerySet]]]:
+            """Return what has to be loaded from database to serialize selected fields (also of nested serializers).
+
+            Returns:
+                tuple: (
+                    field names for QuerySet.only() or None if all columns are needed,
+                    paths for QuerySet.select_related(),
+                    {path for QuerySet.prefetch_related(): queryset for Prefetch object or None},
+                )
+            """
+            only_fields, select_related, prefetch_related = self._get_model_plan(
+                queryset.model, queryset.query.annotations
+            )
+            # Related objects loaded by select_related already used in queryset must not be deferred.
+            if only_fields is not None:
+                if queryset.query.select_related is True:
+                    only_fields = None
+                elif queryset.query.select_related:
+                    only_fields |= set(self._flatten_select_related(queryset.query.select_related))
+            return only_fields, select_related, prefetch_related
+
+        def _get_model_plan(self, model, annotations) -> Tuple[Optional[Set], Set, Dict[str, Optional[QuerySet]]]:
+            """Return plan for get_queryset_plan, without respect to select_related already used in queryset."""
+            only_fields = {model._meta.pk.name}
+            related_columns = set()
+            full_relations = set()  # related objects used as whole (e.g. by nested serializer)
+            select_related = set()
+            prefetch_related = {}
+            load_all_columns = False
+
+            for field in self.new_fields.values():
+                if field.write_only:
+                    continue
+                if isinstance(field, serializers.HyperlinkedIdentityField):
+                    only_fields.add(field.lookup_field)
+                    continue
+                if field.source == '*':
+                    load_all_columns = True  # e.g. SerializerMethodField, it can use any attribute
+                    continue
+
+                current_model = model
+                path = []
+                for attr in field.source_attrs:
+                    model_field = self._get_model_field(current_model, attr)
+                    if model_field is None:
+                        # Property/method of model (it can use any attribute) or annotation of queryset
+                        if not path and attr not in annotations:
+                            load_all_columns = True
+                        break
+
+                    path.append(attr)
+                    lookup = LOOKUP_SEP.join(path)
+                    is_leaf = len(path) == len(field.source_attrs)
+                    nested = field.child if isinstance(field, serializers.ListSerializer) else field
+                    if not is_leaf or not isinstance(nested, DynamicFieldsSerializerMixin):
+                        nested = None
+
+                    if not model_field.is_relation:
+                        (related_columns if len(path) > 1 else only_fields).add(lookup)
+                        break
+                    if model_field.related_model is None:
+                        load_all_columns = True  # e.g. GenericForeignKey, it uses more columns
+                        break
+                    if model_field.many_to_many or model_field.one_to_many:
+                        prefetch_queryset = None
+                        if nested and (model_field.many_to_many or isinstance(model_field, ForeignObjectRel)):
+                            prefetch_queryset = nested._get_prefetch_queryset(model_field)
+                        if lookup in prefetch_related and prefetch_related[lookup] is not prefetch_queryset:
+                            prefetch_queryset = None  # Relation used by more fields, load it whole
+                        prefetch_related[lookup] = prefetch_queryset
+                        break
+
+                    if len(path) == 1:
+                        only_fields.add(lookup)
+                    if is_leaf and isinstance(field, serializers.RelatedField) and field.use_pk_only_optimization():
+                        break  # Only PK of related object is used, it is loaded in FK column
+                    select_related.add(lookup)
+                    if nested:
+                        nested_only, nested_select, nested_prefetch = nested._get_model_plan(
+                            model_field.related_model, ()
+                        )
+                        prefix = lookup + LOOKUP_SEP
+                        if nested_only is None:
+                            full_relations.add(lookup)
+                        else:
+                            related_columns |= {prefix + name for name in nested_only}
+                        select_related |= {prefix + name for name in nested_select}
+                        prefetch_related.update({prefix + name: qs for name, qs in nested_prefetch.items()})
+                    elif is_leaf:
+                        full_relations.add(lookup)
+                    current_model = model_field.related_model
+
+            # Columns of related objects used as whole must not be limited.
+            only_fields |= {
+                column for column in related_columns
+                if not any(column.startswith(relation + LOOKUP_SEP) for relation in full_relations)
+            }
+            # Related objects loaded by select_related must not be deferred.
+            only_fields |= select_related
+            return None if load_all_columns else only_fields, select_related, prefetch_related
+
+        @staticmethod
+        def _get_model_field(model, attr: str):
+            """Return model field by name or by accessor name of reverse relation (e.g. item_set), None if missing."""
+            try:
+                return model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                for relation in model._meta.related_objects:
+                    if relation.get_accessor_name() == attr:
+                        return relation
+            return None
+
+        def _get_prefetch_queryset(self, relation) -> QuerySet:
+            """Return queryset of related objects (to-many relation) limited to fields selected in this serializer."""
+            queryset = relation.related_model._default_manager.all()
+            only_fields, select_related, prefetch_related = self.get_queryset_plan(queryset)
+            if only_fields is not None and relation.one_to_many:
+                only_fields.add(relation.field.name)  # prefetch matches related objects by FK
+            return self._apply_queryset_plan(queryset, (only_fields, select_related, prefetch_related))
+
+        @classmethod
+        def _flatten_select_related(cls, select_related: dict, prefix: str = ''):
+            """Yield lookup paths from nested dict of Query.select_related."""
+            for name, nested in select_related.items():
+                yield prefix + name
+                yield from cls._flatten_select_related(nested, prefix + name + LOOKUP_SEP)
+
+        @staticmethod
+        def _apply_queryset_plan(queryset: QuerySet, plan: tuple) -> QuerySet:
+            only_fields, select_related, prefetch_related = plan
+            if only_fields is not None:
+                queryset = queryset.only(*only_fields)
+            if select_related:
+                queryset = queryset.select_related(*select_related)
+            if prefetch_related:
+                queryset = queryset.prefetch_related(*[
+                    lookup if prefetch_queryset is None else Prefetch(lookup, queryset=prefetch_queryset)
+                    for lookup, prefetch_queryset in prefetch_related.items()
+                ])
+            return queryset
+
+        def optimize_queryset(self, queryset: QuerySet) -> QuerySet:
+            """Limit queryset to load only columns and relations needed to serialize selected fields."""
+            return self._apply_queryset_plan(queryset, self.get_queryset_plan(queryset))
+
+        def get_field_plan_key(self, request, extra_fields) -> tuple:
+            """Return hashable key of field plan, i.e. everything what resolve_field_plan depends on.
+
+            Key contains parsed and sorted names, so e.g. fields=a,b and fields=b&fields=a share one entry.
+            """
+            includes, excludes, extras = self.get_requested_field_names(request, extra_fields)
+            return tuple(self.fields), tuple(sorted(includes)), tuple(sorted(excludes)), tuple(sorted(extras))
+
+        def _split_nested_names(self, names: Set) -> Tuple[Set, Set, Dict[str, Set]]:
+            """Split names like 'author.name' into top level names and names for nested serializers.
+
+            Returns:
+                tuple: (top level names of all names, names without nested part, {top level name: nested names})
+            """
+            top_level_names = set()
+            plain_names = set()
+            nested_names = {}
+            for name in names:
+                head, __, rest = name.partition(self.dynamic_fields_nested_separator)
+                top_level_names.add(head)
+                if rest:
+                    nested_names.setdefault(head, set()).add(rest)
+                else:
+                    plain_names.add(head)
+            return top_level_names, plain_names, nested_names
+
+        def build_field_plan(self, includes: Set, excludes: Set, extras: Set) -> FieldPlan:
+            """Return field plan from names of included, excluded and extra fields (names can be nested)."""
+            include_names, __, include_nested = self._split_nested_names(includes)
+            extra_names, __, extra_nested = self._split_nested_names(extras)
+            # Excluded nested field (e.g. author.email) does not exclude top level field (author).
+            __, exclude_names, exclude_nested = self._split_nested_names(excludes)
+
+            nested = {
+                name: (
+                    frozenset(include_nested.get(name, ())),
+                    frozenset(exclude_nested.get(name, ())),
+                    frozenset(extra_nested.get(name, ())),
+                )
+                for name in {*include_nested, *exclude_nested, *extra_nested}
+            }
+
+            if not include_names and not exclude_names:
+                return FieldPlan(None, nested)
+
+            # If there is no dynamic_fields use defined fields in serializer.
+            if not include_names:
+                include_names = set(self.fields)
+
+            field_names = (include_names | extra_names) - exclude_names
+            return FieldPlan(frozenset(name for name in self.fields if name in field_names), nested)
+
+        def get_requested_field_names(self, request, extra_fields) -> Tuple[Set, Set, Set]:
+            """Return names of included, excluded and extra fields requested by request (and extra_fields)."""
+            extra_field_names = self.get_extra_field_names(request)
+            if extra_fields:
+                extra_field_names = extra_field_names | set(extra_fields)
+            return self.get_dynamic_field_names(request), self.get_exclude_field_names(request), extra_field_names
+
+        def resolve_field_plan(self, request, extra_fields) -> FieldPlan:
+            """Return field plan, i.e. names of fields to serialize (None for all) and plans of nested fields."""
+            return self.build_field_plan(*self.get_requested_field_names(request, extra_fields))
+
+        def resolve_nested_field_plan(self, includes: FrozenSet, excludes: FrozenSet, extras: FrozenSet) -> FieldPlan:
+            """Return field plan of nested serializer for names selected by parent (e.g. 'name' from 'author.name')."""
+            field_groups = self.get_field_groups()
+            include_names = set(includes)
+            if len(includes) == 1 and next(iter(includes)) in field_groups:
+                include_names = set(field_groups[next(iter(includes))])
+            if not include_names and hasattr(self.Meta, 'default_fields'):
+                include_names = set(self.Meta.default_fields)
+            return self.build_field_plan(include_names, set(excludes), set(extras))
+
+        def get_field_plan(self, request, extra_fields) -> FieldPlan:
+            """Return field plan (see resolve_field_plan) from LRU cache of serializer class."""
+            if not self.dynamic_fields_cache_size:
+                return self.resolve_field_plan(request, extra_fields)
+            return self._get_cached_field_plan(
+                self.get_field_plan_key(request, extra_fields),
+                lambda: self.resolve_field_plan(request, extra_fields)
+            )
+
+        def _get_cached_field_plan(self, key: tuple, resolve: Callable[[], FieldPlan]) -> FieldPlan:
+            """Return field plan from LRU cache of serializer class, resolve it on cache miss."""
+            cache_size = self.dynamic_fields_cache_size
+            if not cache_size:
+                return resolve()
+
+            cls = type(self)
+            with _field_plan_cache_lock:
+                cache = cls.__dict__.get('_dynamic_fields_plan_cache')
+                if cache is None:
+                    cache = OrderedDict()
+                    cls._dynamic_fields_plan_cache = cache
+                if key in cache:
+                    cache.move_to_end(key)
+                    return cache[key]
+
+            plan = resolve()
+            with _field_plan_cache_lock:
+                cache[key] = plan
+                while len(cache) > cache_size:
+                    cache.popitem(last=False)
+            return plan
+
+        def apply_field_plan(self, field_plan: FieldPlan):
+            """Set fields to serialize by field plan and propagate nested part of plan into nested serializers."""
+            if field_plan.field_names is None:
+                self.new_fields = {**self.fields}
+            else:
+                self.new_fields = {
+                    name: field for name, field in self.fields.items() if name in field_plan.field_names
+                }
+
+            for name, (includes, excludes, extras) in field_plan.nested.items():
+                nested = self.new_fields.get(name)
+                if isinstance(nested, serializers.ListSerializer):
+                    nested = nested.child
+                if not isinstance(nested, DynamicFieldsSerializerMixin):
+                    continue  # Nested fields can be selected only in serializer with this mixin
+                nested_plan = nested._get_cached_field_plan(
+                    ('nested', tuple(nested.fields), includes, excludes, extras),
+                    lambda: nested.resolve_nested_field_plan(includes, excludes, extras)
+                )
+                nested.apply_field_plan(nested_plan)
+
         def __init__(self, *args, **kwargs):
             extra_fields = kwargs.pop('extra_fields', None)
             super().__init__(*args, **kwargs)
 
             self.show_origin_fields = True
-            self.new_fields = {**self.fields}
 
             request: Request = kwargs.get('context', {}).get('request', None)
-            dynamic_field_names = self.get_dynamic_field_names(request)
-            exclude_field_names = self.get_exclude_field_names(request)
-            extra_field_names = self.get_extra_field_names(request)
+            self.apply_field_plan(self.get_field_plan(request, extra_fields))
 
-            if extra_fields:
-                extra_field_names = extra_field_names | set(extra_fields)
-
-            if not dynamic_field_names and not exclude_field_names:
-                return
 
-            # If there is no dynamic_fields use defined fields in serializer.
-            if not dynamic_field_names:
-                dynamic_field_names = set(self.fields)
-
-            field_names = (dynamic_field_names | extra_field_names) - exclude_field_names
-            drop_field_names = set(self.fields) - field_names
+    def rebind_serializer(serializer: serializers.BaseSerializer, instance=None, data=empty):
+        """Reuse serializer for another instance (and data), drop results of previous validation/serialization.
 
-            for field_name in drop_field_names:
-                self.new_fields.pop(field_name)
+        Fields of serializer are built (deep-copied from declared fields and bound) only once per serializer,
+        so validating many items by one rebound serializer is much cheaper than creating serializer for each item.
+        """
+        serializer.instance = instance
+        if data is not empty:
+            serializer.initial_data = data
+        for attr in ('_validated_data', '_errors', '_data'):
+            serializer.__dict__.pop(attr, None)
+        return serializer
+
+
+    def save_validated_data(serializer: serializers.BaseSerializer, instance, validated_data: dict):
+        """Save validated data (from rebound serializer) by serializer.save() and return saved instance."""
+        rebind_serializer(serializer, instance)
+        serializer._validated_data = validated_data
+        serializer._errors = {}
+        return serializer.save()
@@ -1,24 +1,222 @@
+import base64
+import json
+import pickle
+import threading
+import time
+import uuid
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+
+class CompactSectionCodec:
+    """Encoding of session sections bigger than threshold into compressed string.
+
+    Format: 'Z' + base85 of zlib compressed compact JSON. Smaller (or incompressible) sections
+    are kept as they are, because session serializer would escape them in string.
+    Sizes of encoded sections are counted in stats (see SessionStorage for usage).
+    """
+
+    threshold = 512  # bytes of JSON, smaller sections are not compressed
+    compress_level = 6
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self._stats = {'encoded_sections': 0, 'json_bytes': 0, 'encoded_bytes': 0}
+
+    def encode(self, section: dict):
+        """Return section as compressed string, or section itself if compression does not pay off."""
+        raw = json.dumps(section, separators=(',', ':')).encode('utf-8')  # as JSON session serializer
+        encoded = section
+        encoded_size = len(raw)
+        if len(raw) > self.threshold:
+            compressed = 'Z' + base64.b85encode(zlib.compress(raw, self.compress_level)).decode('ascii')
+            if len(compressed) < len(raw):
+                encoded = compressed
+                encoded_size = len(compressed)
+        with self._stats_lock:
+            self._stats['encoded_sections'] += 1
+            self._stats['json_bytes'] += len(raw)
+            self._stats['encoded_bytes'] += encoded_size
+        return encoded
+
+    def decode(self, encoded) -> dict:
+        if isinstance(encoded, str) and encoded.startswith('Z'):
+            return json.loads(zlib.decompress(base64.b85decode(encoded[1:])))
+        return encoded
+
+    @property
+    def stats(self) -> dict:
+        """Return counters of encoded sections, bytes_saved is difference to plain JSON of session serializer."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['bytes_saved'] = stats['json_bytes'] - stats['encoded_bytes']
+        return stats
+
+
+@lru_cache(maxsize=None)
+def get_section_codec(path: str):
+    """Return shared codec instance of class defined by dotted path (stats are collected per codec)."""
+    return import_string(path)()
+
+
 class SessionStorage:
-    """Class to save data into session section organized by section_id."""
+    """Class to save data into session section organized by section_id.
+
+    Sections can be encoded by codec (e.g. CompactSectionCodec) defined by DCORE_SESSION_STORAGE_CODEC
+    setting (dotted path to class, default None = no encoding). Encoded section is decoded lazily,
+    when it is used by get/set, and at most once per storage instance.
+    """
 
-    def __init__(self, session):
+    def __init__(self, session, codec=None):
         self.session = session
+        if codec is None and getattr(settings, 'DCORE_SESSION_STORAGE_CODEC', None):
+            codec = get_section_codec(settings.DCORE_SESSION_STORAGE_CODEC)
+        self.codec = codec
+        self._decoded = {}  # {section_id: decoded section}
+
+    def _get_section(self, section_id) -> dict:
+        if section_id in self._decoded:
+            return self._decoded[section_id]
+        session_part = self.session.get(section_id, {})
+        if self.codec:
+            session_part = self._decoded[section_id] = self.codec.decode(session_part)
+        return session_part
 
     def set(self, section_id, key, value):
         """Set data to session section."""
-        session_part = self.session.get(section_id, {})
+        session_part = self._get_section(section_id)
         session_part[key] = value
-        self.session[section_id] = session_part
+        if self.codec:
+            self._decoded[section_id] = session_part
+            self.session[section_id] = self.codec.encode(session_part)
+        else:
+            self.session[section_id] = session_part
 
     def get(self, section_id, key, default=None):
         """Get data from session section."""
-        session_part = self.session.get(section_id, {})
+        session_part = self._get_section(section_id)
         return session_part.get(key, default)
 
     def clear(self, section_id):
         """Clear session section."""
+        self._decoded.pop(section_id, None)
         try:
             del self.session[section_id]
             self.session.modified = True
         except KeyError:
             pass  # It is ok, value is already cleared.
+
+
+class CacheSessionStorage:
+    """Class to save data into sections organized by section_id, sections are stored in django cache.
+
+    Session holds only small index of sections, so it does not grow with data of sections.
+    Every section expires after TTL from its last change, max number of sections per session
+    is limited and the least recently changed sections are evicted.
+
+    Settings:
+    - DCORE_SESSION_STORAGE_CACHE = Alias of used cache, default 'default'.
+    - DCORE_SESSION_STORAGE_TTL = Lifetime of section in seconds, default 3600.
+    - DCORE_SESSION_STORAGE_MAX_SECTIONS = Max number of sections per session, default 100.
+    """
+
+    index_key = '_dcore_storage_index'
+    cache_key_prefix = 'dcore_storage'
+
+    def __init__(self, session, cache_alias=None, ttl=None, max_sections=None):
+        self.session = session
+        self.cache = caches[cache_alias or getattr(settings, 'DCORE_SESSION_STORAGE_CACHE', 'default')]
+        self.ttl = ttl if ttl is not None else getattr(settings, 'DCORE_SESSION_STORAGE_TTL', 3600)
+        if max_sections is None:
+            max_sections = getattr(settings, 'DCORE_SESSION_STORAGE_MAX_SECTIONS', 100)
+        self.max_sections = max_sections
+        self._sections = {}  # sections loaded from cache, {section_id: data}
+        self._snapshots = {}  # pickled sections as they are in cache, {section_id: bytes}
+
+    def _get_index(self) -> dict:
+        """Return index of sections, {'namespace': namespace of cache keys, 'sections': {section_id: expiration}}."""
+        index = self.session.get(self.index_key)
+        if index is None:
+            # Namespace is random, so section of other session cannot be loaded by its section_id.
+            index = {'namespace': uuid.uuid4().hex, 'sections': {}}
+        return index
+
+    def _cache_key(self, index: dict, section_id) -> str:
+        return f'{self.cache_key_prefix}:{index["namespace"]}:{section_id}'
+
+    def _load(self, section_id) -> dict:
+        """Return data of section, section is loaded from cache only once per instance."""
+        if section_id not in self._sections:
+            section = None
+            index = self.session.get(self.index_key)
+            if index and index['sections'].get(section_id, 0) > time.time():
+                section = self.cache.get(self._cache_key(index, section_id))
+            self._sections[section_id] = section or {}
+            self._snapshots[section_id] = self._snapshot(self._sections[section_id])
+        return self._sections[section_id]
+
+    @staticmethod
+    def _snapshot(section: dict) -> bytes:
+        """Return serialized form of section, it detects changes also of values changed in place."""
+        return pickle.dumps(section, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _save(self, section_id, section: dict):
+        """Write section into cache and update index in session, evict the oldest sections over limit."""
+        index = self._get_index()
+        now = time.time()
+        sections = {
+            key: expiration for key, expiration in index['sections'].items()
+            if expiration > now and key != section_id
+        }
+        sections[section_id] = now + self.ttl  # the most recently changed section is the last one
+
+        evicted = list(sections)[:max(0, len(sections) - self.max_sections)]
+        for key in evicted:
+            del sections[key]
+            self._sections.pop(key, None)
+            self._snapshots.pop(key, None)
+        if evicted:
+            self.cache.delete_many([self._cache_key(index, key) for key in evicted])
+
+        if section_id in sections:
+            self.cache.set(self._cache_key(index, section_id), section, timeout=self.ttl)
+            self._snapshots[section_id] = self._snapshot(section)
+        index['sections'] = sections
+        self.session[self.index_key] = index
+
+    def set(self, section_id, key, value):
+        """Set data to section, section is written only if it differs from its loaded (or saved) state.
+
+        Section is compared by snapshot, so changes of values returned by get and changed in place are saved too.
+        """
+        section = self._load(section_id)
+        section[key] = value
+        if self._snapshot(section) != self._snapshots.get(section_id):
+            self._save(section_id, section)
+
+    def get(self, section_id, key, default=None):
+        """Get data from section."""
+        return self._load(section_id).get(key, default)
+
+    def clear(self, section_id):
+        """Clear section."""
+        self._sections.pop(section_id, None)
+        self._snapshots.pop(section_id, None)
+        index = self.session.get(self.index_key)
+        if index and section_id in index['sections']:
+            self.cache.delete(self._cache_key(index, section_id))
+            del index['sections'][section_id]
+            self.session[self.index_key] = index
+
+
+def get_session_storage(session):
+    """Return session storage defined by DCORE_SESSION_STORAGE setting (default SessionStorage).
+
+    Setting contains dotted path to class, e.g. 'dcore.service.CacheSessionStorage'.
+    """
+    storage_class = import_string(getattr(settings, 'DCORE_SESSION_STORAGE', 'dcore.service.SessionStorage'))
+    return storage_class(session)
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+
+# Sent after bulk write of dcore bulk helpers (QuerySet.bulk_create/bulk_update/update send no signals).
+# Arguments: sender = model class, using = database alias.
+bulk_changed = Signal()
@@ -0,0 +1,224 @@
+import codecs
+import csv
+import json
+import re
+from typing import Any, Iterable, Iterator, Optional
+
+from .exceptions import InvalidData
+
+
+NDJSON_MEDIA_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/x-jsonlines')
+READ_SIZE = 64 * 1024
+MAX_ITEM_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _JsonStreamReader:
+    """Read JSON values one by one from binary stream, buffer holds only currently parsed value."""
+
+    def __init__(self, stream, read_size: int, max_item_size: int):
+        self.stream = stream
+        self.read_size = read_size
+        self.max_item_size = max_item_size
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        """Read next part of stream into buffer, drop already parsed part of buffer."""
+        data = self.stream.read(self.read_size)
+        self.eof = not data
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(data, final=self.eof)
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Skip whitespaces and return next char (empty string on end of stream)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._read()
+
+    def expect(self, chars: str) -> str:
+        """Consume next char, it has to be one of chars."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise InvalidData(f'Invalid JSON, expected one of "{chars}".')
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Parse next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+                # Value at the end of buffer can be incomplete (e.g. number), valid JSON has always something after it.
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise InvalidData(f'Invalid JSON, {e.msg.lower()}.') from e
+            if len(self.buffer) - self.pos > self.max_item_size:
+                raise InvalidData(f'Invalid data, one value in JSON is longer than {self.max_item_size} characters.')
+            self._read()
+
+
+def iter_json_array(
+    stream,
+    key: Optional[str] = None,
+    read_size: int = READ_SIZE,
+    max_item_size: int = MAX_ITEM_SIZE,
+) -> Iterator[Any]:
+    """Incrementally parse JSON array from binary stream and yield its items.
+
+    Memory usage is proportional to max size of one item, not to size of whole stream.
+
+    Args:
+        stream: Binary file-like object with read(size) method, e.g. HttpRequest.
+        key: If set, stream contains JSON object and array is parsed from this field of the object.
+            If None, stream contains JSON array.
+        read_size: Number of bytes read from stream at once.
+        max_item_size: Max size of one item (or skipped field in object) in characters of decoded text
+            (UTF-8 item can have up to 4 times more bytes), prevents buffering invalid data.
+
+    Raises:
+        InvalidData: If data in stream is not valid JSON or has not expected format.
+    """
+    reader = _JsonStreamReader(stream, read_size, max_item_size)
+    if key is None:
+        if reader.peek() != '[':
+            raise InvalidData('Invalid data, expected JSON array.')
+    else:
+        if reader.peek() != '{':
+            raise InvalidData('Invalid data, expected JSON object.')
+        reader.expect('{')
+        found = False
+        while not found and reader.peek() != '}':
+            name = reader.value()
+            reader.expect(':')
+            if name == key:
+                found = True
+            else:
+                reader.value()  # skip value of other field
+                if reader.expect(',}') == '}':
+                    break
+        if not found:
+            raise InvalidData(f'Invalid data, missing "{key}" field in data.')
+        if reader.peek() != '[':
+            raise InvalidData(f'Invalid data, "{key}" field has to be list.')
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
+
+
+def iter_ndjson(stream, max_item_size: int = MAX_ITEM_SIZE) -> Iterator[Any]:
+    """Parse NDJSON (JSON lines) from binary stream and yield one value per line, empty lines are skipped.
+
+    Unlike iter_json_array, max_item_size is measured in bytes of line.
+
+    Raises:
+        InvalidData: If any line is not valid JSON or is longer than max_item_size.
+    """
+    line_number = 0
+    while line := stream.readline(max_item_size + 1):
+        line_number += 1
+        if len(line) > max_item_size:
+            raise InvalidData(f'Invalid data, line {line_number} is longer than {max_item_size} bytes.')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            raise InvalidData(f'Invalid JSON on line {line_number}.') from e
+        yield value
+
+
+def iter_csv(stream, encoding: str = 'utf-8-sig') -> Iterator[dict]:
+    """Parse CSV with header from binary stream and yield one dict per row, stream is read line by line.
+
+    Empty values are yielded as empty strings, serializer fields convert them.
+
+    Raises:
+        InvalidData: If stream is not valid CSV or cannot be decoded by encoding.
+    """
+    lines = codecs.iterdecode(iter(stream.readline, b''), encoding)
+    reader = csv.DictReader(lines)
+    try:
+        yield from reader
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise InvalidData(f'Invalid CSV on line {reader.line_num}.') from e
+
+
+def iter_request_items(request, key: Optional[str] = None, max_item_size: int = MAX_ITEM_SIZE) -> Iterator[Any]:
+    """Yield items from body of rest_framework request without loading whole body into memory.
+
+    Limit max_item_size is in bytes for NDJSON and in characters for JSON (see iter_ndjson, iter_json_array).
+
+    Body is parsed as NDJSON (one item per line) for NDJSON content types, otherwise as JSON array
+    (see iter_json_array for key argument). Do not access request.data before, it reads whole body.
+    Body is not touched until iteration starts.
+
+    Raises:
+        InvalidData: If body is empty or has invalid format (raised during iteration).
+    """
+    stream = request.stream
+    if stream is None:
+        raise InvalidData('Invalid data, empty request body.')
+    if request.content_type.split(';')[0].strip() in NDJSON_MEDIA_TYPES:
+        yield from iter_ndjson(stream, max_item_size=max_item_size)
+    else:
+        yield from iter_json_array(stream, key=key, max_item_size=max_item_size)
+
+
+def stream_json_array(items: Iterable[Any], encoder=json.JSONEncoder) -> Iterator[str]:
+    """Yield parts of JSON array with items, whole array is never held in memory."""
+    encode = encoder(separators=(',', ':'), ensure_ascii=False).encode
+    yield '['
+    for index, item in enumerate(items):
+        yield (',' if index else '') + encode(item)
+    yield ']'
+
+
+def stream_ndjson(items: Iterable[Any], encoder=json.JSONEncoder) -> Iterator[str]:
+    """Yield items as NDJSON lines (one JSON value per line)."""
+    encode = encoder(separators=(',', ':'), ensure_ascii=False).encode
+    for item in items:
+        yield encode(item) + '\n'
+
+
+class _EchoBuffer:
+    """File-like object returning written value, csv.writer writes into it row by row."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(items: Iterable[dict], encoder=json.JSONEncoder) -> Iterator[str]:
+    """Yield CSV lines of items (dicts), header is made from keys of the first item.
+
+    Nested values (dicts, lists) are written as JSON.
+    """
+    encode = encoder(separators=(',', ':'), ensure_ascii=False).encode
+    writer = csv.writer(_EchoBuffer())
+    header = None
+    for item in items:
+        if header is None:
+            header = list(item.keys())
+            yield writer.writerow(header)
+        yield writer.writerow([
+            encode(value) if isinstance(value, (dict, list)) else value
+            for value in (item.get(name) for name in header)
+        ])
@@ -1,12 +1,16 @@
 import re
 import uuid
 from collections.abc import Iterable, Mapping
+from itertools import islice
 import unicodedata
-from typing import Sequence, Union, Callable, Any, Optional
+from typing import Sequence, Union, Callable, Any, Optional, Iterator, List
 
 from django.utils.translation import gettext as _
 
 
+DEFAULT_BATCH_SIZE = 1000
+
+
 def form_bool_choices():
     """Return tuple with yes/no choices in format for django forms.
 
@@ -130,3 +134,10 @@ def is_drf_friendly_errors_dict(val) -> bool:
         )
     except ValueError:
         return False
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Split iterable into lists with max length of size (last one can be shorter)."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
@@ -37,7 +37,7 @@ def validation_failed_items(
                 'message': item[2],
                 'errors': validation_failed_items(item[3]),
             })
-        return formatted_errors
+    return formatted_errors
 
 
 def validation_failed_dict(
@@ -8,7 +8,7 @@ with open(os.path.join(os.path.dirname(__file__), 'README.rst')) as readme:
 os.chdir(os.path.normpath(os.path.join(os.path.abspath(__file__), os.pardir)))
 
 requires = [
-    'django>=3.1.0',
+    'django>=4.1.0',
     'djangorestframework>=3.10.0',
     'python-dateutil>=2.8.0',
 ]